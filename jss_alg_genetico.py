@@ -1,26 +1,86 @@
 import time
-from typing import List
-import multiprocessing, random
+from typing import List, Tuple
+import multiprocessing, queue
+from array import array
+from jss_bounds import lowerBound
+from jss_budget import Budget
+from jss_cache import EvaluationCache
+from jss_decoder import DECODERS, Schedule, activeMakespan, canonicalKey, makespan
+from jss_events import EventStream, RateLimiter
+from jss_instances import ProblemInstance, readInstance
+from jss_pool import PoolEvaluator
+from jss_random import RandomStream, makeRandom
+
+#O decodificador em lote é opcional e depende do NumPy
+try:
+    from jss_batch_decoder import asArrays, crossoverBatch, decodeBatch
+except ImportError:
+    decodeBatch = None
+
+#Precedence Preservative Crossover (PPX) em O(n)
+#O gene retirado de um pai é sempre a primeira ocorrência restante daquele job nos dois pais, então basta contar quantas
+#operações de cada job já foram usadas e avançar um ponteiro em cada pai, pulando as ocorrências já consumidas
+def precedencePreservativeCrossover(parent1: List[int], parent2: List[int], crossGene: List[int], J: int):
+    parents = (parent1, parent2)
+    occurrences = (occurrenceIndex(parent1, J), occurrenceIndex(parent2, J))
+    pointers = [0, 0]
+    used = [0 for _ in range(J)]
+    
+    newSolution = []
+    for c in crossGene:
+        parent = parents[c]
+        occurrence = occurrences[c]
+        p = pointers[c]
+        
+        while occurrence[p] < used[parent[p]]:
+            p += 1
+            
+        gene = parent[p]
+        pointers[c] = p + 1
+        used[gene] += 1
+        newSolution.append(gene)
+        
+    return newSolution
+
+#Para cada posição, quantas vezes o job daquela posição já apareceu antes dela
+def occurrenceIndex(solution: List[int], J: int):
+    count = [0 for _ in range(J)]
+    occurrence = []
+    for gene in solution:
+        occurrence.append(count[gene])
+        count[gene] += 1
+    return occurrence
 
 #Classe que representa um indivíduo da população
+#A solução é guardada como um array de inteiros
+#O escalonamento é decodificado uma vez e guardado até a solução mudar (mutate)
 class InstanceJSS():
+    __slots__ = ("solution", "apt", "cachedSchedule")
+    
     def __init__(self,solution: List[int]):
-        self.solution = solution
+        self.solution = array("i", solution)
         self.apt = 0
+        self.cachedSchedule : Schedule = None
+        
+    def schedule(self, context: 'ContextJSS') -> Schedule:
+        if self.cachedSchedule is None:
+            self.cachedSchedule = Schedule(self.solution, context.OFlat, context.TFlat, context.J, context.M, context.decoder == "active")
+        return self.cachedSchedule
         
     def __str__(self):
-        return f"Solution: {self.solution} - APT: {self.apt}"
+        return f"Solution: {list(self.solution)} - APT: {self.apt}"
     
-    def mutate(self):
-        i = random.randint(0, len(self.solution) - 1)
-        j = random.randint(0, len(self.solution) - 1)
+    def mutate(self, rng: RandomStream):
+        i = rng.randint(0, len(self.solution) - 1)
+        j = rng.randint(0, len(self.solution) - 1)
         while self.solution[i] == self.solution[j]:
-            j = random.randint(0, len(self.solution) - 1)
+            j = rng.randint(0, len(self.solution) - 1)
         self.solution[i], self.solution[j] = self.solution[j], self.solution[i]
+        self.cachedSchedule = None
                     
 #Classe geral, que representa o contexto do problema      
 class ContextJSS():
-    def __init__(self, mutationRate: 0.1, populationSize: 10):
+    def __init__(self, mutationRate: 0.1, populationSize: 10, batchDecoder: bool = False, decoder: str = "semiactive", cacheMemory: float = 0, seed: int = None, randomBatch: int = 0, evaluationWorkers: int = 0):
         #Numero de Jobs
         self.J : int = 0
         #Numero de Máquinas
@@ -29,29 +89,59 @@ class ContextJSS():
         self.T : List[List[int]] = []
         #Ordem de Processamento
         self.O : List[List[int]] = []
+        #O e T planos, indexados por job*M + operação (máquina e tempo de cada operação)
+        self.OFlat = array("i")
+        self.TFlat = array("i")
+        #Limite inferior do makespan (jss_bounds): um indivíduo que chega nele é ótimo e o GA para
+        self.lowerBound = 0
         #Taxa de Mutação
         self.mutationRate = mutationRate
         #Tamanho da População
         self.populationSize = populationSize
+        #Avalia a população inteira de uma vez com o NumPy
+        self.batchDecoder = batchDecoder
+        #Decodificador dos indivíduos: "semiactive" ou "active"
+        self.decoder = decoder
+        #Cache dos makespans, com até cacheMemory MB (None com 0)
+        #Os sobreviventes de cada geração são avaliados de novo junto com os filhos, então eles sempre acertam o cache
+        self.cache = EvaluationCache(cacheMemory) if cacheMemory > 0 else None
+        #Número de soluções avaliadas (sem contar os acertos do cache)
+        self.evaluations = 0
+        #Intervalo mínimo, em segundos, entre duas impressões do progresso
+        self.printInterval = 1.0
+        #Imprime o progresso no stdout (os eventos "progress" são publicados mesmo sem imprimir)
+        self.verbose = True
+        #Gerador de números aleatórios do GA (None sorteia a semente); com randomBatch > 0 os sorteios saem de um buffer desse tamanho
+        self.randomBatch = randomBatch
+        self.rng : RandomStream = makeRandom(seed, randomBatch)
+        #Processos do pool que avalia as gerações grandes (0 ou 1 avalia tudo no próprio processo)
+        #O pool só é criado pelo runGA se uma geração tiver pelo menos evaluationMinOperations operações (indivíduos x J*M)
+        self.evaluationWorkers = evaluationWorkers
+        self.evaluationMinOperations = 200000
+        self.evaluator : PoolEvaluator = None
+        
+        if batchDecoder and decodeBatch is None:
+            raise ImportError("O decodificador em lote precisa do NumPy")
+        if decoder not in DECODERS:
+            raise ValueError(f"Decodificador desconhecido: {decoder}")
         
     def load(self, fileName: str):
-        file = open(fileName, "r")
-        self.J, self.M = list(map(int,file.readline().split()))
+        self.loadInstance(readInstance(fileName))
         
-        self.T = [[0 for _ in range(self.M)] for _ in range(self.J)]
-        self.O = [[0 for _ in range(self.M)] for _ in range(self.J)]
+    def setSeed(self, seed: int):
+        self.rng = makeRandom(seed, self.randomBatch)
         
-        for i in range(self.J):
-            line = list(map(int, file.readline().split()))
-            lastMachine = -1
-            for j in range(self.M * 2):
-                if j % 2 == 0:
-                    self.O[i][j // 2] = line[j]
-                    lastMachine = line[j]
-                else:
-                    self.T[i][lastMachine] = line[j]
-                    
-        file.close()
+    def loadInstance(self, instance: ProblemInstance):
+        self.J, self.M = instance.J, instance.M
+        self.O, self.T = instance.O, instance.T
+        self.OFlat, self.TFlat = instance.flatArrays()
+        self.lowerBound = lowerBound(self.O, self.T)
+        
+        if self.batchDecoder:
+            self.OArray, self.TArray = asArrays(self.O, self.T)
+            
+        if self.cache is not None:
+            self.cache.resize(self.J * self.M)
     
     def __str__(self):
         resp = f"Number of Jobs: {self.J} x Number of Machines: {self.M}\n\n"
@@ -71,67 +161,83 @@ class ContextJSS():
         population = []
         for _ in range(self.populationSize):
             newSolution = [i for i in range(0, self.J) for _ in range(self.M)]
-            random.shuffle(newSolution)
+            self.rng.shuffle(newSolution)
             population.append(InstanceJSS(newSolution))
     
         return population
     
+    #Indivíduos que vieram do cache sem decodificar (não entram em evaluations)
+    def cacheHits(self) -> int:
+        return self.cache.hits if self.cache is not None else 0
+        
     def evaluateSolution(self, instance: InstanceJSS):
         solution = instance.solution
         
-        #Guarda informações sobre o tempo atual de cada máquia e de cada job
-        currentOperation = [0 for _ in range(self.J)]
-        machineTime = [0 for _ in range(self.M)]
-        jobTime = [0 for _ in range(self.J)]
+        key = None
+        if self.cache is not None:
+            key = canonicalKey(solution, self.OFlat, self.J, self.M)
+            apt = self.cache.get(key)
+            if apt is not None:
+                instance.apt = apt
+                return
         
-        maxTime = 0
+        self.evaluations += 1
         
-        for i in range(len(solution)):
-            job = solution[i]
-            machine = self.O[job][currentOperation[job]]
-            time = self.T[job][machine]
+        if self.decoder == "active":
+            instance.apt = activeMakespan(solution, self.OFlat, self.TFlat, self.J, self.M)
+        else:
+            instance.apt = makespan(solution, self.OFlat, self.TFlat, self.J, self.M)
             
-            if machineTime[machine] > jobTime[job]:
-                machineTime[machine] += time
-                jobTime[job] = machineTime[machine]
-            else:
-                jobTime[job] += time
-                machineTime[machine] = jobTime[job]
-                
-                
-            maxTime = max(maxTime, machineTime[machine])
-            
-            currentOperation[job] += 1
-            
-        instance.apt = maxTime
+        if key is not None:
+            self.cache.put(key, instance.apt)
         
-    def printDetailedSolution(self, instance: InstanceJSS):
-        solution = instance.solution
-        currentOperation = [0 for _ in range(self.J)]
-        machineTime = [0 for _ in range(self.M)]
-        jobTime = [0 for _ in range(self.J)]
+    #O decodificador em lote só gera escalonamentos semi-ativos, então com o ativo cada indivíduo é avaliado separadamente
+    #Com o pool (evaluator), os lotes grandes vão para os processos do pool, com qualquer decodificador
+    #Com o cache, só os indivíduos que não estão nele vão para o lote
+    def evaluatePopulation(self, population: List[InstanceJSS]):
+        parallel = self.evaluator is not None and self.evaluator.worthwhile(len(population))
         
+        if not parallel and (not self.batchDecoder or self.decoder == "active"):
+            for instance in population:
+                self.evaluateSolution(instance)
+            return
         
-        #Guarda a sequencia de tarefas em cada maquina
-        taskSeq = [[] for _ in range(self.M)]
-        
-        for i in range(len(solution)):
-            job = solution[i]
-            machine = self.O[job][currentOperation[job]]
-            time = self.T[job][machine]
+        keys = None
+        if self.cache is not None:
+            pending, keys = [], []
+            for instance in population:
+                key = canonicalKey(instance.solution, self.OFlat, self.J, self.M)
+                apt = self.cache.get(key)
+                if apt is None:
+                    pending.append(instance)
+                    keys.append(key)
+                else:
+                    instance.apt = apt
+            population = pending
             
-            if machineTime[machine] > jobTime[job]:
-                taskSeq[machine].append([job, machineTime[machine], machineTime[machine] + time])
-                
-                machineTime[machine] += time
-                jobTime[job] = machineTime[machine]
-            else:
-                taskSeq[machine].append([job, jobTime[job], jobTime[job] + time])
-                
-                jobTime[job] += time
-                machineTime[machine] = jobTime[job]
+            if not population:
+                return
+        
+        #Depois do cache podem sobrar poucos indivíduos, que ficam no próprio processo
+        if parallel and self.evaluator.worthwhile(len(population)):
+            makespans = self.evaluator.evaluate([instance.solution for instance in population])
+        elif self.batchDecoder and self.decoder != "active":
+            makespans = decodeBatch([instance.solution for instance in population], self.OArray, self.TArray)
+        else:
+            evaluate = activeMakespan if self.decoder == "active" else makespan
+            makespans = [evaluate(instance.solution, self.OFlat, self.TFlat, self.J, self.M) for instance in population]
+        self.evaluations += len(population)
+        
+        for instance, apt in zip(population, makespans):
+            instance.apt = int(apt)
             
-            currentOperation[job] += 1
+        if keys is not None:
+            for key, instance in zip(keys, population):
+                self.cache.put(key, instance.apt)
+        
+    def printDetailedSolution(self, instance: InstanceJSS):
+        #Guarda a sequencia de tarefas em cada maquina
+        taskSeq = instance.schedule(self).taskSequences()
         
         print(f"\n{instance}")
         for m in range(self.M):
@@ -142,38 +248,45 @@ class ContextJSS():
     
     #Crossover utilizando Precedence Preservative Crossover (PPX)
     def crossoverInstances(self, instance1: InstanceJSS, instance2: InstanceJSS):
-        newSolution = []
-        instance1Cpy = instance1.solution.copy()
-        instance2Cpy = instance2.solution.copy()
-        crossGene = [random.randint(0,1) for _ in range(len(instance1Cpy))]
-        
-        for i in range(len(crossGene)):
-            if crossGene[i] == 0:
-                gene = instance1Cpy.pop(0)
-                newSolution.append(gene)
-                instance2Cpy.remove(gene)
-            else:
-                gene = instance2Cpy.pop(0)
-                newSolution.append(gene)
-                instance1Cpy.remove(gene)
+        crossGene = [self.rng.randint(0,1) for _ in range(len(instance1.solution))]
+        
+        newSolution = precedencePreservativeCrossover(instance1.solution, instance2.solution, crossGene, self.J)
                 
         childInstance = InstanceJSS(newSolution)
         
-        if random.uniform(0,1) < self.mutationRate:
-            childInstance.mutate()
+        if self.rng.random() < self.mutationRate:
+            childInstance.mutate(self.rng)
         
         return childInstance
     
+    #Gera dois filhos por par de pais de uma vez, com o PPX em lote do NumPy
+    #Os sorteios são feitos antes do crossover, então a sequência do rng é diferente da do crossoverInstances
+    def crossoverPairs(self, pairs: List[Tuple[InstanceJSS, InstanceJSS]]):
+        n = self.J * self.M
+        
+        parents1 = [instance1.solution for instance1, _ in pairs for _ in range(2)]
+        parents2 = [instance2.solution for _, instance2 in pairs for _ in range(2)]
+        crossGenes = [[(bits >> i) & 1 for i in range(n)] for bits in (self.rng.getrandbits(n) for _ in range(len(parents1)))]
+        
+        children = [InstanceJSS(solution) for solution in crossoverBatch(parents1, parents2, crossGenes, self.J).tolist()]
+        
+        for childInstance in children:
+            if self.rng.random() < self.mutationRate:
+                childInstance.mutate(self.rng)
+                
+        return children
+    
     #Crossover da população, sempre gera o dobro de indivíduos  
     def crossover(self, population: List[InstanceJSS]):
         max = sum(1/x.apt for x in population)
         newPopulation = []
+        pairs = []
         while population:
             instance1 = population.pop(0)
             max -= instance1.apt
             instance2 = None
             current = 0
-            pick = random.uniform(0,max)
+            pick = self.rng.uniform(0,max)
             for i in range(len(population)):
                 current += 1/population[i].apt
                 if current >= pick:
@@ -181,11 +294,21 @@ class ContextJSS():
                     max -= instance2.apt
                     break
             
+            if self.batchDecoder:
+                pairs.append((instance1, instance2))
+                continue
+            
             newInstances = [self.crossoverInstances(instance1, instance2) for _ in range(2)]
             newPopulation.extend(newInstances)
             newPopulation.append(instance1)
             newPopulation.append(instance2)
             
+        if self.batchDecoder:
+            children = self.crossoverPairs(pairs)
+            for i in range(len(pairs)):
+                newPopulation.extend(children[2*i:2*i + 2])
+                newPopulation.extend(pairs[i])
+            
         return newPopulation
     
     #Seleção de indivíduos a partir de torneio
@@ -193,9 +316,9 @@ class ContextJSS():
         newPopulation = []
         
         while population:
-            instance1 = random.choice(population)
+            instance1 = self.rng.choice(population)
             population.remove(instance1)
-            instance2 = random.choice(population)
+            instance2 = self.rng.choice(population)
             population.remove(instance2)
             if instance1.apt < instance2.apt:
                 newPopulation.append(instance1)
@@ -204,49 +327,193 @@ class ContextJSS():
                 
         return newPopulation
     
-    def runGA(self, generationLimit: int, goal: int, return_dict: dict):
+    #return_dict: recebe o melhor e o pior indivíduo a cada geração (opcional)
+    #island: quando o GA roda como uma ilha do modelo de ilhas (None quando roda sozinho)
+    #events: recebe um evento a cada novo melhor ou pior indivíduo, uma amostra do progresso a cada printInterval segundos
+    #e um evento "final" com o motivo da parada
+    #timeLimit e maxEvaluations: orçamento em segundos e em avaliações (-1 para sem limite), verificado a cada geração
+    #Retorna o melhor e o pior indivíduo
+    def runGA(self, generationLimit: int, goal: int, return_dict: dict = None, island: 'IslandJSS' = None, events: EventStream = None, timeLimit: float = -1, maxEvaluations: int = -1):
         population : List[InstanceJSS] = []
+        
+        progress = RateLimiter(self.printInterval)
+        budget = Budget(timeLimit, maxEvaluations).start(self.evaluations)
+        
+        #Processos criados por fork herdam o mesmo estado do rng, então cada ilha usa o fluxo derivado do seu índice
+        if island is not None:
+            self.rng = self.rng.spawn(island.index)
+            
+            if events is not None:
+                events.source = island.index
+                
+        #Cada geração avalia até populationSize*2 indivíduos
+        if self.evaluationWorkers > 1 and self.populationSize * 2 * self.J * self.M >= self.evaluationMinOperations:
+            self.evaluator = PoolEvaluator(self.evaluationWorkers, self.OFlat, self.TFlat, self.J, self.M, self.decoder, self.evaluationMinOperations)
 
-        population = context.createInitialPopulation()
+        population = self.createInitialPopulation()
 
-        for instance in population:
-            context.evaluateSolution(instance)
+        self.evaluatePopulation(population)
             
         population.sort(key = lambda x: x.apt)
         bestInstance = population[0]
         worstInstance = population[-1]
+        
+        if events is not None:
+            events.publish(0, bestInstance.apt, bestInstance.solution, self.evaluations)
+            events.publish(0, worstInstance.apt, worstInstance.solution, self.evaluations, "worst")
 
         nGenerations = float("inf") if generationLimit == -1 else generationLimit
             
         currentIteration = 0
+        status = "ITERATION_LIMIT"
 
         while currentIteration < nGenerations:
-            currentIteration += 1
+            if bestInstance.apt <= self.lowerBound or goal != -1 and bestInstance.apt <= goal:
+                status = "OPTIMAL" if bestInstance.apt <= self.lowerBound else "GOAL"
+                if island is not None:
+                    island.report(bestInstance, worstInstance, return_dict)
+                    island.finish(status == "OPTIMAL")
+                break
+            
+            if budget.exhausted(self.evaluations):
+                status = budget.status
+                break
             
-            population = context.crossover(population)
+            currentIteration += 1
             
-            print(f"\nGeneration {currentIteration}")
+            population = self.crossover(population)
             
-            for i in range(populationSize*2):
-                context.evaluateSolution(population[i])
+            self.evaluatePopulation(population[:self.populationSize*2])
                 
-            population = context.selectNewPopulation(population)
+            population = self.selectNewPopulation(population)
             population.sort(key = lambda x: x.apt)
             
-            print("Best Fitness: ", population[0].apt)
-            print("AVG Fitness: ", sum(x.apt for x in population)/populationSize)
+            if progress.due():
+                if self.verbose:
+                    print(f"\nGeneration {currentIteration}")
+                    print("Best Fitness: ", population[0].apt)
+                    print("AVG Fitness: ", sum(x.apt for x in population)/self.populationSize)
+                    if self.cache is not None:
+                        print(self.cache)
+                
+                if events is not None:
+                    events.publish(currentIteration, bestInstance.apt, None, self.evaluations, "progress", cacheHits = self.cacheHits())
             
             if population[-1].apt > worstInstance.apt:
                 worstInstance = population[-1]
+                
+                if events is not None:
+                    events.publish(currentIteration, worstInstance.apt, worstInstance.solution, self.evaluations, "worst")
             if population[0].apt < bestInstance.apt:
                 bestInstance = population[0]
                 
-                if goal != -1 and bestInstance.apt <= goal:
+                if events is not None:
+                    events.publish(currentIteration, bestInstance.apt, bestInstance.solution, self.evaluations)
+            
+            if island is not None:
+                #Outra ilha já achou uma solução ótima ou atingiu o objetivo
+                if island.done.is_set():
+                    status = "OPTIMAL" if island.optimal.is_set() else "GOAL"
                     break
+                
+                if currentIteration % island.migrationInterval == 0:
+                    population = island.migrate(self, population)
+                    
+                island.report(bestInstance, worstInstance, return_dict)
+                continue
+                
+            if return_dict is not None:
+                return_dict["best"] = bestInstance
+                return_dict["worst"] = worstInstance
+                
+        if events is not None:
+            events.publish(currentIteration, bestInstance.apt, None, self.evaluations, "final", status, self.cacheHits())
+            
+        if self.evaluator is not None:
+            self.evaluator.close()
+            self.evaluator = None
+            
+        return bestInstance, worstInstance
+            
+    #Modelo de ilhas: nIslands processos rodam o GA, cada um com a sua população,
+    #e a cada migrationInterval gerações cada ilha envia os seus migrants melhores indivíduos para a próxima ilha do anel
+    #Cada ilha para sozinha no tempo limite (ou com maxEvaluations avaliações), então nenhuma é encerrada à força
+    #return_dict: dicionário compartilhado (ex: de um multiprocessing.Manager) que recebe o melhor de cada ilha (opcional)
+    #events: cada ilha publica os seus eventos com source = índice da ilha
+    def runIslandGA(self, nIslands: int, timeLimit: int, generationLimit: int, goal: int, migrationInterval: int, migrants: int, return_dict: dict = None, events: EventStream = None, maxEvaluations: int = -1):
+        queues = [multiprocessing.Queue() for _ in range(nIslands)]
+        lock = multiprocessing.Lock()
+        done = multiprocessing.Event()
+        optimal = multiprocessing.Event()
+        
+        processes = []
+        for i in range(nIslands):
+            island = IslandJSS(i, queues[i], queues[(i + 1) % nIslands], migrationInterval, migrants, lock, done, optimal)
+            processes.append(multiprocessing.Process(target=self.runGA, name=f"GA-{i}", args=(generationLimit, goal, return_dict, island, events, timeLimit, maxEvaluations)))
             
+        for p in processes:
+            p.start()
+            
+        if events is not None:
+            events.wait(processes)
+            
+        for p in processes:
+            p.join()
                 
-            return_dict["best"] = bestInstance
-            return_dict["worst"] = worstInstance
+#Uma ilha do GA paralelo
+#Só as soluções dos migrantes passam pelas filas, a população de cada ilha fica no seu processo
+class IslandJSS():
+    def __init__(self, index: int, inbox, outbox, migrationInterval: int, migrants: int, lock, done, optimal):
+        self.index = index
+        self.inbox = inbox
+        self.outbox = outbox
+        self.migrationInterval = migrationInterval
+        self.migrants = migrants
+        self.lock = lock
+        #done: alguma ilha parou no objetivo ou no limite inferior; optimal: foi no limite inferior (a solução é ótima)
+        self.done = done
+        self.optimal = optimal
+        
+    #Avisa as outras ilhas que elas podem parar, e por qual motivo
+    def finish(self, optimal: bool):
+        if optimal:
+            self.optimal.set()
+        self.done.set()
+        
+    #Envia os melhores indivíduos (a população está ordenada) e troca os piores pelos migrantes recebidos
+    def migrate(self, context: ContextJSS, population: List[InstanceJSS]):
+        self.outbox.put([array("i", instance.solution) for instance in population[:self.migrants]])
+        
+        newcomers = []
+        while True:
+            try:
+                newcomers.extend(InstanceJSS(solution) for solution in self.inbox.get_nowait())
+            except queue.Empty:
+                break
+            
+        newcomers = newcomers[:len(population) - self.migrants]
+        if not newcomers:
+            return population
+        
+        context.evaluatePopulation(newcomers)
+        
+        population = population[:len(population) - len(newcomers)] + newcomers
+        population.sort(key = lambda x: x.apt)
+        
+        return population
+    
+    #Publica o melhor da ilha e atualiza o melhor e o pior global
+    def report(self, bestInstance: InstanceJSS, worstInstance: InstanceJSS, return_dict: dict):
+        if return_dict is None:
+            return
+        
+        with self.lock:
+            return_dict[f"island{self.index}"] = bestInstance.apt
+            
+            if "best" not in return_dict or bestInstance.apt < return_dict["best"].apt:
+                return_dict["best"] = bestInstance
+            if "worst" not in return_dict or worstInstance.apt > return_dict["worst"].apt:
+                return_dict["worst"] = worstInstance
             
         
                      
@@ -254,41 +521,76 @@ class ContextJSS():
 mutationRate = 0.15
 populationSize = 20
 
-context = ContextJSS(mutationRate, populationSize)
+#Avalia cada geração em lote (precisa do NumPy)
+batchDecoder = False
 
-context.load("job-shop.txt")
+#Decodificador: "semiactive" (cada operação começa em max(máquina, job)) ou "active" (preenche os intervalos ociosos das máquinas)
+decoder = "semiactive"
 
-timeLimit = int(input("Tempo limite em segundos: (-1 para sem limite)\n"))
-generationLimit = int(input("Limite de gerações: (-1 para sem limite)\n"))
-scoreGoal = int(input("Makespan Objetivo: (-1 para sem objetivo)\n"))
+#Memória máxima, em MB, do cache de avaliações (0 desliga)
+cacheMemory = 64
 
-#Overkill para garantir que seja feito por multiprocessamento
-manager = multiprocessing.Manager()
-return_dict = manager.dict()
+#Número de ilhas do GA (1 roda uma única população)
+nIslands = 1
 
-p = multiprocessing.Process(target=context.runGA, name="GA", args=(generationLimit,scoreGoal,return_dict))
+#A cada migrationInterval gerações, cada ilha envia os seus migrants melhores indivíduos para a próxima
+migrationInterval = 10
+migrants = 2
 
-tInitial = time.time()
-p.start()
+#Arquivo JSON-lines que recebe a linha do tempo das melhorias (None para não gravar)
+eventsFile = None
 
-if timeLimit != -1:
-    p.join(timeLimit)
-else:
-    p.join()
+#Semente do gerador de números aleatórios (None para sortear) e tamanho do buffer de sorteios (0 sorteia um por vez)
+seed = None
+randomBatch = 0
 
-if p.is_alive():
-    p.terminate()
-    
-tFinal = time.time()
-    
-bestInstance, worstInstance = return_dict["best"], return_dict["worst"]
+#Processos que avaliam as gerações em paralelo (0 avalia no próprio processo)
+#Só vale a pena com populações grandes em instâncias grandes; abaixo de ContextJSS.evaluationMinOperations o GA não cria o pool
+evaluationWorkers = 0
 
-print("\nWorse Solution: ")
-context.printDetailedSolution(worstInstance)
+#Limite de avaliações de cada ilha (-1 para sem limite)
+maxEvaluations = -1
+
+if __name__ == "__main__":
+    context = ContextJSS(mutationRate, populationSize, batchDecoder, decoder, cacheMemory, seed, randomBatch, evaluationWorkers)
+
+    context.load("job-shop.txt")
+
+    timeLimit = int(input("Tempo limite em segundos: (-1 para sem limite)\n"))
+    generationLimit = int(input("Limite de gerações: (-1 para sem limite)\n"))
+    scoreGoal = int(input("Makespan Objetivo: (-1 para sem objetivo)\n"))
+
+    #Com uma única população o GA roda aqui mesmo e para sozinho no tempo limite
+    events = EventStream(eventsFile, crossProcess = nIslands > 1)
+
+    tInitial = time.time()
+
+    if nIslands > 1:
+        context.runIslandGA(nIslands, timeLimit, generationLimit, scoreGoal, migrationInterval, migrants, events = events, maxEvaluations = maxEvaluations)
+        
+        #O melhor e o pior global vêm dos eventos das ilhas
+        best, worst = events.best(), max((event for event in events.events if event.kind == "worst"), key = lambda event: event.makespan)
+
+        bestInstance, worstInstance = InstanceJSS(best.solution), InstanceJSS(worst.solution)
+        bestInstance.apt, worstInstance.apt = best.makespan, worst.makespan
+    else:
+        bestInstance, worstInstance = context.runGA(generationLimit, scoreGoal, events = events, timeLimit = timeLimit, maxEvaluations = maxEvaluations)
+        
+        print(f"\nStop: {events.last('final').status} - Evaluations: {context.evaluations}")
+        
+    tFinal = time.time()
+    
+    events.close()
 
-print("\nBest Solution: ")  
-context.printDetailedSolution(bestInstance)
+    print("\nWorse Solution: ")
+    context.printDetailedSolution(worstInstance)
 
-print(f"\nTime: {round(tFinal - tInitial,3)}s")
+    print("\nBest Solution: ")  
+    context.printDetailedSolution(bestInstance)
+    print(f"Lower Bound: {context.lowerBound}")
 
+    for i in range(nIslands if nIslands > 1 else 0):
+        islandBest = min((event.makespan for event in events.events if event.kind == "best" and event.source == i), default = None)
+        print(f"Island {i} - Best Fitness: {islandBest}")
 
+    print(f"\nTime: {round(tFinal - tInitial,3)}s")
@@ -0,0 +1,127 @@
+from typing import List, Tuple
+import numpy as np
+
+#Converte as matrizes O (ordem das máquinas de cada job) e T (tempo do job em cada máquina) para arrays do NumPy
+def asArrays(O: List[List[int]], T: List[List[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    return np.asarray(O, dtype=np.int64), np.asarray(T, dtype=np.int64)
+
+#Decodifica várias ordens de processamento ao mesmo tempo
+#population tem formato (população, J*M) e todas as linhas avançam juntas, uma posição por vez
+#initialState = (machineTime, jobTime, currentOperation) permite começar da posição start com um prefixo já decodificado,
+#o mesmo para todas as linhas
+def decodeBatch(population, O: np.ndarray, T: np.ndarray, start: int = 0, initialState = None) -> np.ndarray:
+    population = np.asarray(population, dtype=np.int64)
+    if population.ndim == 1:
+        population = population.reshape(1, -1)
+
+    nRows, n = population.shape
+    J, M = O.shape
+
+    if M == 0:
+        return np.zeros(nRows, dtype=np.int64)
+
+    #Máquina e tempo de cada operação, indexados por job*M + operação
+    operationMachine = O.ravel()
+    operationTime = np.take_along_axis(T, O, axis=1).ravel()
+
+    #O estado fica em arrays planos indexados por linha*M + máquina e linha*J + job, e as posições da ordem ficam
+    #contíguas na memória, o que evita a indexação 2-D (mais lenta) a cada passo
+    if initialState is None:
+        machineTime = np.zeros(nRows * M, dtype=np.int64)
+        jobTime = np.zeros(nRows * J, dtype=np.int64)
+        nextOperation = np.tile(np.arange(J, dtype=np.int64) * M, nRows)
+    else:
+        machineTime = np.tile(np.asarray(initialState[0], dtype=np.int64), nRows)
+        jobTime = np.tile(np.asarray(initialState[1], dtype=np.int64), nRows)
+        nextOperation = np.tile(np.asarray(initialState[2], dtype=np.int64) + np.arange(J, dtype=np.int64) * M, nRows)
+
+    rowsM = np.arange(nRows, dtype=np.int64) * M
+    rowsJ = np.arange(nRows, dtype=np.int64) * J
+    positions = np.ascontiguousarray(population[:, start:].T)
+
+    for job in positions:
+        jobIndex = rowsJ + job
+        operation = nextOperation[jobIndex]
+        machineIndex = rowsM + operationMachine[operation]
+
+        #decodeStep do jss_decoder para todas as linhas de uma vez: começa quando a máquina e o job estão livres
+        end = np.maximum(machineTime[machineIndex], jobTime[jobIndex]) + operationTime[operation]
+
+        machineTime[machineIndex] = end
+        jobTime[jobIndex] = end
+        nextOperation[jobIndex] = operation + 1
+
+    return machineTime.reshape(nRows, M).max(axis=1)
+
+#Pares de posições (i, j), i < j, cuja troca muda a ordem (os jobs das duas posições são diferentes), ordenados por i e j
+def swapPairs(processingOrder: List[int]) -> Tuple[np.ndarray, np.ndarray]:
+    order = np.asarray(processingOrder, dtype=np.int64)
+    iIndex, jIndex = np.triu_indices(len(order), 1)
+    distinct = order[iIndex] != order[jIndex]
+
+    return iIndex[distinct], jIndex[distinct]
+
+#Gera, como uma matriz, as ordens obtidas trocando as posições iIndex[r] e jIndex[r] de processingOrder
+def swapPairsBatch(processingOrder: List[int], iIndex: np.ndarray, jIndex: np.ndarray) -> np.ndarray:
+    order = np.asarray(processingOrder, dtype=np.int64)
+    batch = np.tile(order, (len(iIndex), 1))
+    rows = np.arange(len(iIndex))
+
+    batch[rows, iIndex] = order[jIndex]
+    batch[rows, jIndex] = order[iIndex]
+
+    return batch
+
+#Precedence Preservative Crossover (PPX) de vários pares de pais ao mesmo tempo
+#parents1, parents2 e crossGenes têm formato (filhos, J*M); crossGenes[r][t] diz de qual pai sai o t-ésimo gene do filho r
+#Cada pai tem um ponteiro que pula as ocorrências de jobs já consumidas, como no PPX sequencial
+def crossoverBatch(parents1, parents2, crossGenes, J: int) -> np.ndarray:
+    parents1 = np.asarray(parents1, dtype=np.int64)
+    parents2 = np.asarray(parents2, dtype=np.int64)
+    crossGenes = np.asarray(crossGenes, dtype=np.int64)
+
+    nRows, n = parents1.shape
+    rows = np.arange(nRows)
+
+    occurrences1 = occurrenceBatch(parents1, J)
+    occurrences2 = occurrenceBatch(parents2, J)
+
+    pointers1 = np.zeros(nRows, dtype=np.int64)
+    pointers2 = np.zeros(nRows, dtype=np.int64)
+    used = np.zeros((nRows, J), dtype=np.int64)
+    children = np.empty((nRows, n), dtype=np.int64)
+
+    for t in range(n):
+        fromFirst = crossGenes[:, t] == 0
+        pointer = np.where(fromFirst, pointers1, pointers2)
+
+        while True:
+            safePointer = np.minimum(pointer, n - 1)
+            gene = np.where(fromFirst, parents1[rows, safePointer], parents2[rows, safePointer])
+            occurrence = np.where(fromFirst, occurrences1[rows, safePointer], occurrences2[rows, safePointer])
+
+            consumed = occurrence < used[rows, gene]
+            if not consumed.any():
+                break
+            pointer = pointer + consumed
+
+        children[:, t] = gene
+        used[rows, gene] += 1
+        pointers1 = np.where(fromFirst, pointer + 1, pointers1)
+        pointers2 = np.where(fromFirst, pointers2, pointer + 1)
+
+    return children
+
+#Para cada linha e posição, quantas vezes o job daquela posição já apareceu antes dela na linha
+def occurrenceBatch(population: np.ndarray, J: int) -> np.ndarray:
+    nRows, n = population.shape
+    rows = np.arange(nRows)
+
+    count = np.zeros((nRows, J), dtype=np.int64)
+    occurrences = np.empty((nRows, n), dtype=np.int64)
+
+    for i in range(n):
+        occurrences[:, i] = count[rows, population[:, i]]
+        count[rows, population[:, i]] += 1
+
+    return occurrences
@@ -0,0 +1,93 @@
+import argparse, csv, fnmatch, json, multiprocessing, os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from jss_instances import ProblemInstance, readInstances
+from jss_solver import ALGORITHMS, solve
+
+#Roda uma combinação (instância, algoritmo, semente) e monta uma linha da tabela
+#Com eventsDir, a linha do tempo das melhorias de cada execução é gravada em <eventsDir>/<instância>-<algoritmo>-<semente>.jsonl
+def runCase(algorithm: str, instance: ProblemInstance, timeLimit: int, seed: int, mipGrace: int, eventsDir: str = None):
+    eventsFile = None if eventsDir is None else os.path.join(eventsDir, f"{instance.name}-{algorithm}-{seed}.jsonl")
+
+    result = solve(instance, algorithm, timeLimit, seed, eventsFile = eventsFile, mipGrace = mipGrace)
+
+    return {
+        "instance": instance.name,
+        "jobs": instance.J,
+        "machines": instance.M,
+        "algorithm": algorithm,
+        "seed": seed,
+        "timeLimit": timeLimit,
+        "makespan": result.makespan,
+        "lowerBound": result.lowerBound,
+        "bestKnown": instance.bestKnown,
+        "gap": result.gap(),
+        "wallTime": round(result.wallTime, 3),
+        "evaluations": result.evaluations,
+        "cacheHits": result.cacheHits,
+        #Decodificações por segundo; com o cache, os acertos ficam em cacheHits e não entram aqui
+        "evaluationsPerSecond": round(result.evaluations / result.wallTime, 1) if result.evaluations else None,
+        #Soluções avaliadas por segundo, decodificadas ou vindas do cache (comparável entre execuções com e sem cache)
+        "solutionsPerSecond": round((result.evaluations + (result.cacheHits or 0)) / result.wallTime, 1) if result.evaluations else None,
+        "status": result.status,
+    }
+
+#Seleciona as instâncias pelo nome, aceitando padrões como "la0*" ou "ft??"
+def selectInstances(instances: dict, patterns: List[str]) -> List[ProblemInstance]:
+    if not patterns:
+        return list(instances.values())
+
+    return [instance for name, instance in instances.items() if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)]
+
+def runBenchmark(instances: List[ProblemInstance], algorithms: List[str], timeLimit: int, seeds: List[int], jobs: int = 1, mipGrace: int = 10, eventsDir: str = None):
+    cases = [(algorithm, instance, seed) for instance in instances for algorithm in algorithms for seed in seeds]
+
+    if eventsDir is not None:
+        os.makedirs(eventsDir, exist_ok=True)
+
+    #Cada processo do pool roda um caso por vez (o solve cria o processo do solver e espera por ele), então jobs é o número
+    #de solvers rodando ao mesmo tempo
+    #Processos em vez de threads: o solve faz um fork, e um fork de um processo com threads pode herdar um lock travado
+    #(ex: o do stdout); com o fork os processos do pool são criados antes da thread que os gerencia e não têm threads
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context("fork")) as executor:
+        futures = [executor.submit(runCase, algorithm, instance, timeLimit, seed, mipGrace, eventsDir) for algorithm, instance, seed in cases]
+        rows = []
+        for future in futures:
+            row = future.result()
+            print(f"{row['instance']} - {row['algorithm']} - seed {row['seed']}: {row['makespan']} (lower bound {row['lowerBound']}, gap {row['gap']}%) in {row['wallTime']}s")
+            rows.append(row)
+
+    return rows
+
+#Grava em JSON se o arquivo terminar em .json, senão em CSV
+def writeResults(rows: List[dict], fileName: str):
+    if fileName.endswith(".json"):
+        with open(fileName, "w") as file:
+            json.dump(rows, file, indent=2)
+        return
+
+    with open(fileName, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0].keys()) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dos solvers do job-shop sobre as instâncias da OR-Library")
+    parser.add_argument("instances", nargs="*", help="nomes ou padrões das instâncias (ex: ft06 la0*); todas se omitido")
+    parser.add_argument("--file", default="job-shop-test-cases.txt", help="arquivo com as instâncias")
+    parser.add_argument("--algorithms", nargs="+", choices=ALGORITHMS, default=["ils", "ga"])
+    parser.add_argument("--time-limit", type=int, default=10, help="tempo limite de cada execução, em segundos")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[0])
+    parser.add_argument("--jobs", type=int, default=multiprocessing.cpu_count(), help="execuções em paralelo")
+    parser.add_argument("--output", default="benchmark.csv", help="arquivo de saída (.csv ou .json)")
+    parser.add_argument("--events", default=None, metavar="DIR", help="grava a linha do tempo das melhorias de cada execução em DIR")
+    args = parser.parse_args()
+
+    instances = selectInstances(readInstances(args.file), args.instances)
+    rows = runBenchmark(instances, args.algorithms, args.time_limit, args.seeds, args.jobs, eventsDir=args.events)
+
+    writeResults(rows, args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import heapq
+from typing import List, Tuple
+
+#Limites inferiores do makespan calculados a partir de O (máquinas de cada job, na ordem) e T (tempo do job em cada máquina)
+#Quando a melhor solução de um solver chega ao limite ela é ótima, e o solver pode parar
+
+#head[j][m]: soma dos tempos das operações do job j antes da operação na máquina m
+#tail[j][m]: soma dos tempos das operações do job j depois dela
+def headsAndTails(O: List[List[int]], T: List[List[int]]) -> Tuple[List[List[int]], List[List[int]]]:
+    J, M = len(O), len(O[0]) if O else 0
+
+    head = [[0 for _ in range(M)] for _ in range(J)]
+    tail = [[0 for _ in range(M)] for _ in range(J)]
+    for j in range(J):
+        total = sum(T[j])
+        elapsed = 0
+        for m in O[j]:
+            head[j][m] = elapsed
+            elapsed += T[j][m]
+            tail[j][m] = total - elapsed
+
+    return head, tail
+
+#Nenhum job termina antes da soma dos tempos das suas operações
+def jobBound(O: List[List[int]], T: List[List[int]]) -> int:
+    return max((sum(times) for times in T), default = 0)
+
+#Cada máquina processa todas as suas operações, mas a primeira não começa antes do menor head
+#e a última não termina antes do menor tail
+def machineBound(O: List[List[int]], T: List[List[int]]) -> int:
+    J, M = len(O), len(O[0]) if O else 0
+    head, tail = headsAndTails(O, T)
+
+    return max((sum(T[j][m] for j in range(J)) + min(head[j][m] for j in range(J)) + min(tail[j][m] for j in range(J)) for m in range(M)), default = 0)
+
+#Limite de uma máquina com preempção: as operações chegam no seu head, saem depois de mais tail unidades de tempo,
+#e a máquina sempre processa a operação disponível com o maior tail (regra de Jackson), que é ótima com preempção
+def jacksonMachineBound(releases: List[int], times: List[int], tails: List[int]) -> int:
+    pending = sorted(range(len(releases)), key = lambda operation: releases[operation])
+    #Operações disponíveis: (-tail, tempo restante, operação)
+    available = []
+
+    now = 0
+    bound = 0
+    arrived = 0
+    while arrived < len(pending) or available:
+        if not available:
+            now = max(now, releases[pending[arrived]])
+
+        while arrived < len(pending) and releases[pending[arrived]] <= now:
+            operation = pending[arrived]
+            heapq.heappush(available, (-tails[operation], times[operation], operation))
+            arrived += 1
+
+        negativeTail, remaining, operation = heapq.heappop(available)
+
+        #Roda até terminar ou até a próxima chegada, que pode ter um tail maior
+        run = remaining if arrived == len(pending) else min(remaining, releases[pending[arrived]] - now)
+        now += run
+
+        if run == remaining:
+            bound = max(bound, now - negativeTail)
+        else:
+            heapq.heappush(available, (negativeTail, remaining - run, operation))
+
+    return bound
+
+def jacksonBound(O: List[List[int]], T: List[List[int]]) -> int:
+    J, M = len(O), len(O[0]) if O else 0
+    head, tail = headsAndTails(O, T)
+
+    return max((jacksonMachineBound([head[j][m] for j in range(J)], [T[j][m] for j in range(J)], [tail[j][m] for j in range(J)]) for m in range(M)), default = 0)
+
+#Maior dos três limites
+def lowerBound(O: List[List[int]], T: List[List[int]]) -> int:
+    return max(jobBound(O, T), machineBound(O, T), jacksonBound(O, T))
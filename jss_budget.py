@@ -0,0 +1,33 @@
+import time
+
+#Orçamento de uma execução do solver: tempo de parede em segundos e número de avaliações (-1 para sem limite)
+#O solver chama exhausted() nos seus laços e termina sozinho, com a melhor solução e as estatísticas consistentes
+#Cada chamada lê o relógio, então laços muito curtos (como a vizinhança do localSearch) só verificam a cada tantas iterações
+#status guarda o motivo da parada ("TIME_LIMIT" ou "EVALUATION_LIMIT") e fica como None enquanto há orçamento
+class Budget():
+    __slots__ = ("timeLimit", "maxEvaluations", "deadline", "firstEvaluation", "status")
+
+    def __init__(self, timeLimit: float = -1, maxEvaluations: int = -1):
+        self.timeLimit = timeLimit
+        self.maxEvaluations = maxEvaluations
+        self.deadline = None
+        self.firstEvaluation = 0
+        self.status : str = None
+
+    #Começa a contar a partir de agora e do contador de avaliações atual do contexto
+    def start(self, evaluations: int = 0) -> 'Budget':
+        self.deadline = None if self.timeLimit == -1 else time.monotonic() + self.timeLimit
+        self.firstEvaluation = evaluations
+        self.status = None
+        return self
+
+    def exhausted(self, evaluations: int) -> bool:
+        if self.status is not None:
+            return True
+
+        if self.maxEvaluations != -1 and evaluations - self.firstEvaluation >= self.maxEvaluations:
+            self.status = "EVALUATION_LIMIT"
+        elif self.deadline is not None and time.monotonic() >= self.deadline:
+            self.status = "TIME_LIMIT"
+
+        return self.status is not None
@@ -0,0 +1,46 @@
+from collections import OrderedDict
+
+#Cache LRU dos makespans, indexado pela forma canônica da ordem (canonicalKey do jss_decoder)
+#O limite é dado em megabytes; o número de entradas é estimado pelo tamanho da chave (4 bytes por operação)
+#mais o custo fixo de cada entrada do dicionário
+class EvaluationCache():
+    __slots__ = ("maxMemory", "maxEntries", "entries", "hits", "misses")
+
+    #Custo aproximado, em bytes, de uma entrada além da chave (objeto bytes, int e nó do OrderedDict)
+    entryOverhead = 200
+
+    def __init__(self, maxMemory: float = 64):
+        self.maxMemory = maxMemory
+        self.maxEntries = 0
+        self.entries : OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    #Define o número máximo de entradas para chaves de n operações (chamado ao carregar a instância)
+    def resize(self, n: int):
+        self.maxEntries = int(self.maxMemory * 2**20) // (4 * n + self.entryOverhead)
+        self.entries.clear()
+
+    def get(self, key: bytes) -> int:
+        score = self.entries.get(key)
+
+        if score is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return score
+
+    def put(self, key: bytes, score: int):
+        self.entries[key] = score
+
+        if len(self.entries) > self.maxEntries:
+            self.entries.popitem(last = False)
+
+    def hitRate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self):
+        return f"Cache: {len(self.entries)}/{self.maxEntries} entries - Hits: {self.hits} - Misses: {self.misses} - Hit Rate: {round(100 * self.hitRate(), 2)}%"
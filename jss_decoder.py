@@ -0,0 +1,484 @@
+import bisect, os, random, warnings
+from array import array
+from typing import List
+
+#Núcleo de decodificação compartilhado pelos solvers
+#Todas as funções recebem a ordem de processamento (um job por posição) e O/T planos, indexados por job*M + operação
+#makespan/schedule geram escalonamentos semi-ativos (cada operação começa em max(tempo da máquina, tempo do job));
+#activeMakespan/activeSchedule geram escalonamentos ativos, encaixando cada operação no primeiro intervalo ocioso da máquina que a comporte
+#Se o Numba estiver instalado as funções são compiladas (JIT), senão é usado o código em Python puro
+#JSS_NO_JIT=1 força o Python puro (e evita importar o Numba, que é a maior parte do tempo de importação)
+numba = None
+if not os.environ.get("JSS_NO_JIT"):
+    try:
+        import numba
+        import numpy as np
+    except ImportError:
+        numba = None
+
+#Estado da decodificação antes da primeira posição: tempo de cada máquina, tempo de cada job e próxima operação de cada job
+#nextOperation[job] = índice (job*M + operação) da próxima operação do job
+def initialStatePython(J: int, M: int):
+    return [0 for _ in range(M)], [0 for _ in range(J)], [job * M for job in range(J)]
+
+#Um passo da decodificação semi-ativa, o único lugar com a regra: a próxima operação do job começa quando a máquina e o
+#job estão livres
+#Atualiza o estado e retorna o fim da operação; só usa indexação e comparações, então o Numba compila o mesmo código
+#(decodeStepKernel)
+def decodeStep(job, machineTime, jobTime, nextOperation, OFlat, TFlat):
+    operation = nextOperation[job]
+    machine = OFlat[operation]
+
+    end = machineTime[machine]
+    if jobTime[job] > end:
+        end = jobTime[job]
+    end += TFlat[operation]
+
+    machineTime[machine] = end
+    jobTime[job] = end
+    nextOperation[job] = operation + 1
+
+    return end
+
+#Continua a decodificação a partir da posição start, com o estado de prefixStates naquela posição
+def makespanFromPython(processingOrder, start: int, machineTime, jobTime, nextOperation, OFlat, TFlat) -> int:
+    machineTime = list(machineTime)
+    jobTime = list(jobTime)
+    nextOperation = list(nextOperation)
+
+    for i in range(start, len(processingOrder)):
+        decodeStep(processingOrder[i], machineTime, jobTime, nextOperation, OFlat, TFlat)
+
+    #Os tempos das máquinas nunca diminuem, então o makespan é o maior tempo final
+    return max(machineTime, default = 0)
+
+def makespanPython(processingOrder, OFlat, TFlat, J: int, M: int) -> int:
+    machineTime, jobTime, nextOperation = initialStatePython(J, M)
+    return makespanFromPython(processingOrder, 0, machineTime, jobTime, nextOperation, OFlat, TFlat)
+
+#Estado da decodificação antes de cada posição (n + 1 linhas): tempos das máquinas, tempos dos jobs e próxima operação de cada job
+def prefixStatesPython(processingOrder, OFlat, TFlat, J: int, M: int):
+    machineTime, jobTime, nextOperation = initialStatePython(J, M)
+
+    machineTimes = [machineTime.copy()]
+    jobTimes = [jobTime.copy()]
+    nextOperations = [nextOperation.copy()]
+
+    for job in processingOrder:
+        decodeStep(job, machineTime, jobTime, nextOperation, OFlat, TFlat)
+
+        machineTimes.append(machineTime.copy())
+        jobTimes.append(jobTime.copy())
+        nextOperations.append(nextOperation.copy())
+
+    return machineTimes, jobTimes, nextOperations
+
+#Máquina, início e fim da operação de cada posição da ordem
+def schedulePython(processingOrder, OFlat, TFlat, J: int, M: int):
+    n = len(processingOrder)
+    machineTime, jobTime, nextOperation = initialStatePython(J, M)
+
+    machines = [0 for _ in range(n)]
+    starts = [0 for _ in range(n)]
+    ends = [0 for _ in range(n)]
+
+    for i in range(n):
+        job = processingOrder[i]
+        operation = nextOperation[job]
+
+        machines[i] = OFlat[operation]
+        ends[i] = decodeStep(job, machineTime, jobTime, nextOperation, OFlat, TFlat)
+        starts[i] = ends[i] - TFlat[operation]
+
+    return machines, starts, ends
+
+#Decodificação ativa (Giffler-Thompson com inserção em intervalos ociosos), usando a ordem como lista de prioridades:
+#cada operação vai para o primeiro intervalo ocioso da sua máquina que começa (ou termina) depois do job estar pronto e cabe o seu tempo
+#Os intervalos ociosos de cada máquina ficam em duas listas ordenadas (inícios e fins); o último vai até o infinito
+def activeSchedulePython(processingOrder, OFlat, TFlat, J: int, M: int):
+    n = len(processingOrder)
+    infinity = float("inf")
+
+    nextOperation = [job * M for job in range(J)]
+    jobTime = [0 for _ in range(J)]
+    gapStarts = [[0] for _ in range(M)]
+    gapEnds = [[infinity] for _ in range(M)]
+
+    machines = [0 for _ in range(n)]
+    starts = [0 for _ in range(n)]
+    ends = [0 for _ in range(n)]
+
+    for i in range(n):
+        job = processingOrder[i]
+        operation = nextOperation[job]
+        machine = OFlat[operation]
+        time = TFlat[operation]
+        ready = jobTime[job]
+
+        machineStarts = gapStarts[machine]
+        machineEnds = gapEnds[machine]
+
+        #Os intervalos são disjuntos, então os fins também estão ordenados e a busca começa no primeiro que termina depois do job estar pronto
+        g = bisect.bisect_left(machineEnds, ready)
+        start = max(machineStarts[g], ready)
+        while start + time > machineEnds[g]:
+            g += 1
+            start = max(machineStarts[g], ready)
+        end = start + time
+
+        gapStart, gapEnd = machineStarts[g], machineEnds[g]
+        if start > gapStart and end < gapEnd:
+            machineEnds[g] = start
+            machineStarts.insert(g + 1, end)
+            machineEnds.insert(g + 1, gapEnd)
+        elif start > gapStart:
+            machineEnds[g] = start
+        elif end < gapEnd:
+            machineStarts[g] = end
+        else:
+            del machineStarts[g]
+            del machineEnds[g]
+
+        machines[i] = machine
+        starts[i] = start
+        ends[i] = end
+
+        jobTime[job] = end
+        nextOperation[job] = operation + 1
+
+    return machines, starts, ends
+
+def activeMakespanPython(processingOrder, OFlat, TFlat, J: int, M: int) -> int:
+    _, _, ends = activeSchedulePython(processingOrder, OFlat, TFlat, J, M)
+    return max(ends, default = 0)
+
+#Forma canônica da ordem: as sequências de jobs de cada máquina, concatenadas em bytes
+#Ordens com as mesmas sequências por máquina geram o mesmo escalonamento (semi-ativo ou ativo), então a chave identifica o escalonamento
+def canonicalKeyPython(processingOrder, OFlat, J: int, M: int) -> bytes:
+    nextOperation = [job * M for job in range(J)]
+    sequences = [array("i") for _ in range(M)]
+
+    for job in processingOrder:
+        operation = nextOperation[job]
+        sequences[OFlat[operation]].append(job)
+        nextOperation[job] = operation + 1
+
+    return b"".join(sequence.tobytes() for sequence in sequences)
+
+if numba is not None:
+    #Mesmas funções do Python puro, com o estado em arrays do NumPy; o passo é o próprio decodeStep compilado
+    decodeStepKernel = numba.njit(cache = True)(decodeStep)
+
+    @numba.njit(cache = True)
+    def initialStateKernel(J, M):
+        return np.zeros(M, dtype = np.int64), np.zeros(J, dtype = np.int64), np.arange(J) * M
+
+    @numba.njit(cache = True)
+    def makespanFromKernel(order, start, machineTime, jobTime, nextOperation, OFlat, TFlat):
+        machineTime = machineTime.copy()
+        jobTime = jobTime.copy()
+        nextOperation = nextOperation.copy()
+
+        for i in range(start, order.shape[0]):
+            decodeStepKernel(order[i], machineTime, jobTime, nextOperation, OFlat, TFlat)
+
+        return machineTime.max() if machineTime.shape[0] > 0 else 0
+
+    @numba.njit(cache = True)
+    def makespanKernel(order, OFlat, TFlat, J, M):
+        machineTime, jobTime, nextOperation = initialStateKernel(J, M)
+        return makespanFromKernel(order, 0, machineTime, jobTime, nextOperation, OFlat, TFlat)
+
+    @numba.njit(cache = True)
+    def prefixStatesKernel(order, OFlat, TFlat, J, M):
+        n = order.shape[0]
+        machineTimes = np.zeros((n + 1, M), dtype = np.int64)
+        jobTimes = np.zeros((n + 1, J), dtype = np.int64)
+        nextOperations = np.zeros((n + 1, J), dtype = np.int64)
+        machineTimes[0], jobTimes[0], nextOperations[0] = initialStateKernel(J, M)
+
+        for i in range(n):
+            machineTimes[i + 1] = machineTimes[i]
+            jobTimes[i + 1] = jobTimes[i]
+            nextOperations[i + 1] = nextOperations[i]
+
+            #As linhas são views, então o passo atualiza o estado da posição i + 1
+            decodeStepKernel(order[i], machineTimes[i + 1], jobTimes[i + 1], nextOperations[i + 1], OFlat, TFlat)
+
+        return machineTimes, jobTimes, nextOperations
+
+    @numba.njit(cache = True)
+    def scheduleKernel(order, OFlat, TFlat, J, M):
+        n = order.shape[0]
+        machineTime, jobTime, nextOperation = initialStateKernel(J, M)
+
+        machines = np.zeros(n, dtype = np.int64)
+        starts = np.zeros(n, dtype = np.int64)
+        ends = np.zeros(n, dtype = np.int64)
+
+        for i in range(n):
+            job = order[i]
+            operation = nextOperation[job]
+
+            machines[i] = OFlat[operation]
+            ends[i] = decodeStepKernel(job, machineTime, jobTime, nextOperation, OFlat, TFlat)
+            starts[i] = ends[i] - TFlat[operation]
+
+        return machines, starts, ends
+
+    #Mesma decodificação do activeSchedulePython, com os intervalos ociosos em matrizes M x (J + 1)
+    #Cada operação divide um intervalo em no máximo dois, então uma máquina nunca tem mais que J + 1 intervalos
+    @numba.njit(cache = True)
+    def activeScheduleKernel(order, OFlat, TFlat, J, M):
+        n = order.shape[0]
+        infinity = np.iinfo(np.int64).max
+        nextOperation = np.arange(J) * M
+        jobTime = np.zeros(J, dtype = np.int64)
+        gapStarts = np.zeros((M, J + 1), dtype = np.int64)
+        gapEnds = np.full((M, J + 1), infinity, dtype = np.int64)
+        gapCount = np.ones(M, dtype = np.int64)
+
+        machines = np.zeros(n, dtype = np.int64)
+        starts = np.zeros(n, dtype = np.int64)
+        ends = np.zeros(n, dtype = np.int64)
+
+        for i in range(n):
+            job = order[i]
+            operation = nextOperation[job]
+            machine = OFlat[operation]
+            time = TFlat[operation]
+            ready = jobTime[job]
+            count = gapCount[machine]
+
+            g = np.searchsorted(gapEnds[machine, :count], ready)
+            start = max(gapStarts[machine, g], ready)
+            while start + time > gapEnds[machine, g]:
+                g += 1
+                start = max(gapStarts[machine, g], ready)
+            end = start + time
+
+            gapStart = gapStarts[machine, g]
+            gapEnd = gapEnds[machine, g]
+            if start > gapStart and end < gapEnd:
+                for l in range(count, g + 1, -1):
+                    gapStarts[machine, l] = gapStarts[machine, l - 1]
+                    gapEnds[machine, l] = gapEnds[machine, l - 1]
+                gapEnds[machine, g] = start
+                gapStarts[machine, g + 1] = end
+                gapEnds[machine, g + 1] = gapEnd
+                gapCount[machine] = count + 1
+            elif start > gapStart:
+                gapEnds[machine, g] = start
+            elif end < gapEnd:
+                gapStarts[machine, g] = end
+            else:
+                for l in range(g, count - 1):
+                    gapStarts[machine, l] = gapStarts[machine, l + 1]
+                    gapEnds[machine, l] = gapEnds[machine, l + 1]
+                gapCount[machine] = count - 1
+
+            machines[i] = machine
+            starts[i] = start
+            ends[i] = end
+
+            jobTime[job] = end
+            nextOperation[job] = operation + 1
+
+        return machines, starts, ends
+
+    @numba.njit(cache = True)
+    def canonicalKeyKernel(order, OFlat, J, M):
+        #Início do trecho de cada máquina na chave
+        offsets = np.zeros(M + 1, dtype = np.int64)
+        for operation in range(OFlat.shape[0]):
+            offsets[OFlat[operation] + 1] += 1
+        for machine in range(M):
+            offsets[machine + 1] += offsets[machine]
+
+        nextOperation = np.arange(J) * M
+        key = np.zeros(order.shape[0], dtype = np.int32)
+
+        for i in range(order.shape[0]):
+            job = order[i]
+            operation = nextOperation[job]
+            machine = OFlat[operation]
+
+            key[offsets[machine]] = job
+            offsets[machine] += 1
+            nextOperation[job] = operation + 1
+
+        return key
+
+    #array('i') vira um array do NumPy sem cópia
+    def asIntArray(values):
+        if isinstance(values, array):
+            return np.frombuffer(values, dtype = np.int32) if len(values) else np.zeros(0, dtype = np.int32)
+        return np.asarray(values)
+
+    def makespanNumba(processingOrder, OFlat, TFlat, J: int, M: int) -> int:
+        return int(makespanKernel(asIntArray(processingOrder), asIntArray(OFlat), asIntArray(TFlat), J, M))
+
+    def prefixStatesNumba(processingOrder, OFlat, TFlat, J: int, M: int):
+        return prefixStatesKernel(asIntArray(processingOrder), asIntArray(OFlat), asIntArray(TFlat), J, M)
+
+    def makespanFromNumba(processingOrder, start: int, machineTime, jobTime, nextOperation, OFlat, TFlat) -> int:
+        return int(makespanFromKernel(asIntArray(processingOrder), start, np.asarray(machineTime, dtype = np.int64), np.asarray(jobTime, dtype = np.int64), np.asarray(nextOperation, dtype = np.int64), asIntArray(OFlat), asIntArray(TFlat)))
+
+    def scheduleNumba(processingOrder, OFlat, TFlat, J: int, M: int):
+        machines, starts, ends = scheduleKernel(asIntArray(processingOrder), asIntArray(OFlat), asIntArray(TFlat), J, M)
+        return machines.tolist(), starts.tolist(), ends.tolist()
+
+    def activeScheduleNumba(processingOrder, OFlat, TFlat, J: int, M: int):
+        machines, starts, ends = activeScheduleKernel(asIntArray(processingOrder), asIntArray(OFlat), asIntArray(TFlat), J, M)
+        return machines.tolist(), starts.tolist(), ends.tolist()
+
+    def canonicalKeyNumba(processingOrder, OFlat, J: int, M: int) -> bytes:
+        return canonicalKeyKernel(asIntArray(processingOrder), asIntArray(OFlat), J, M).tobytes()
+
+    def activeMakespanNumba(processingOrder, OFlat, TFlat, J: int, M: int) -> int:
+        _, _, ends = activeScheduleKernel(asIntArray(processingOrder), asIntArray(OFlat), asIntArray(TFlat), J, M)
+        return int(ends.max()) if ends.shape[0] > 0 else 0
+
+#Compara as duas implementações em instâncias e ordens aleatórias
+def selfCheck(trials: int = 20) -> bool:
+    rng = random.Random(0)
+
+    for _ in range(trials):
+        J, M = rng.randint(1, 8), rng.randint(1, 8)
+        OFlat = array("i", [machine for _ in range(J) for machine in rng.sample(range(M), M)])
+        TFlat = array("i", [rng.randint(1, 99) for _ in range(J * M)])
+
+        processingOrder = array("i", [job for job in range(J) for _ in range(M)])
+        rng.shuffle(processingOrder)
+
+        if makespanPython(processingOrder, OFlat, TFlat, J, M) != makespanNumba(processingOrder, OFlat, TFlat, J, M):
+            return False
+        if schedulePython(processingOrder, OFlat, TFlat, J, M) != scheduleNumba(processingOrder, OFlat, TFlat, J, M):
+            return False
+        if activeSchedulePython(processingOrder, OFlat, TFlat, J, M) != activeScheduleNumba(processingOrder, OFlat, TFlat, J, M):
+            return False
+        if canonicalKeyPython(processingOrder, OFlat, J, M) != canonicalKeyNumba(processingOrder, OFlat, J, M):
+            return False
+
+        start = rng.randint(0, J * M)
+        pythonStates = prefixStatesPython(processingOrder, OFlat, TFlat, J, M)
+        numbaStates = prefixStatesNumba(processingOrder, OFlat, TFlat, J, M)
+        pythonScore = makespanFromPython(processingOrder, start, pythonStates[0][start], pythonStates[1][start], pythonStates[2][start], OFlat, TFlat)
+        numbaScore = makespanFromNumba(processingOrder, start, numbaStates[0][start], numbaStates[1][start], numbaStates[2][start], OFlat, TFlat)
+        if pythonScore != numbaScore:
+            return False
+
+    return True
+
+accelerated = False
+
+if numba is not None:
+    if selfCheck():
+        accelerated = True
+    else:
+        warnings.warn("O decodificador compilado pelo Numba não confere com o de Python puro, usando o Python puro")
+
+if accelerated:
+    makespan, prefixStates, makespanFrom, schedule = makespanNumba, prefixStatesNumba, makespanFromNumba, scheduleNumba
+    activeMakespan, activeSchedule, canonicalKey = activeMakespanNumba, activeScheduleNumba, canonicalKeyNumba
+else:
+    makespan, prefixStates, makespanFrom, schedule = makespanPython, prefixStatesPython, makespanFromPython, schedulePython
+    activeMakespan, activeSchedule, canonicalKey = activeMakespanPython, activeSchedulePython, canonicalKeyPython
+
+#Decodificadores disponíveis nos solvers: "semiactive" (o padrão) ou "active"
+DECODERS = ("semiactive", "active")
+
+#Escalonamento semi-ativo de uma ordem de processamento, decodificado uma única vez
+#Por posição p da ordem: operations[p] (índice job*M + operação), machines[p], starts[p] e ends[p]
+#Por operação o (job*M + operação): operationStarts[o] e operationEnds[o]
+#machineSequences[m] = posições das operações da máquina m na ordem em que são processadas
+#active: usa a decodificação ativa em vez da semi-ativa
+class Schedule():
+    __slots__ = ("J", "M", "processingOrder", "operations", "machines", "starts", "ends", "operationStarts", "operationEnds", "machineSequences", "makespan", "blocks")
+
+    def __init__(self, processingOrder, OFlat, TFlat, J: int, M: int, active: bool = False):
+        self.J = J
+        self.M = M
+        self.processingOrder = array("i", processingOrder)
+        self.machines, self.starts, self.ends = (activeSchedule if active else schedule)(processingOrder, OFlat, TFlat, J, M)
+
+        n = len(processingOrder)
+        nextOperation = [job * M for job in range(J)]
+        self.operations = [0 for _ in range(n)]
+        self.operationStarts = [0 for _ in range(J * M)]
+        self.operationEnds = [0 for _ in range(J * M)]
+        self.machineSequences = [[] for _ in range(M)]
+
+        for i in range(n):
+            job = processingOrder[i]
+            operation = nextOperation[job]
+            nextOperation[job] = operation + 1
+
+            self.operations[i] = operation
+            self.operationStarts[operation] = self.starts[i]
+            self.operationEnds[operation] = self.ends[i]
+            self.machineSequences[self.machines[i]].append(i)
+
+        #Na decodificação ativa uma operação pode entrar antes das que já estavam na máquina
+        if active:
+            for sequence in self.machineSequences:
+                sequence.sort(key = lambda i: self.starts[i])
+
+        self.makespan = max(self.ends, default = 0)
+        self.blocks = None
+
+    #Sequência de tarefas de cada máquina: [job, início, fim]
+    def taskSequences(self) -> List[List[List[int]]]:
+        return [[[self.processingOrder[i], self.starts[i], self.ends[i]] for i in sequence] for sequence in self.machineSequences]
+
+    #Caminho crítico: posições das operações, da primeira até a que termina no makespan
+    #Volta da operação que termina no makespan pelos arcos sem folga, preferindo o arco da máquina
+    def criticalPath(self) -> List[int]:
+        n = len(self.processingOrder)
+        if n == 0:
+            return []
+
+        machinePred = [-1 for _ in range(n)]
+        for sequence in self.machineSequences:
+            for l in range(1, len(sequence)):
+                machinePred[sequence[l]] = sequence[l - 1]
+
+        jobPred = [-1 for _ in range(n)]
+        jobLast = [-1 for _ in range(self.J)]
+        for i in range(n):
+            job = self.processingOrder[i]
+            jobPred[i] = jobLast[job]
+            jobLast[job] = i
+
+        current = max(range(n), key = lambda i: self.ends[i])
+        path = [current]
+        while self.starts[current] > 0:
+            if machinePred[current] != -1 and self.ends[machinePred[current]] == self.starts[current]:
+                current = machinePred[current]
+            else:
+                current = jobPred[current]
+            path.append(current)
+        path.reverse()
+
+        return path
+
+    #Blocos críticos: sequências máximas de operações consecutivas do caminho crítico na mesma máquina
+    #Cada bloco é a lista das posições das suas operações na ordem de processamento
+    def criticalBlocks(self) -> List[List[int]]:
+        if self.blocks is not None:
+            return self.blocks
+
+        path = self.criticalPath()
+
+        self.blocks = []
+        for position in path:
+            if self.blocks and self.machines[position] == self.machines[self.blocks[-1][-1]]:
+                self.blocks[-1].append(position)
+            else:
+                self.blocks.append([position])
+
+        return self.blocks
+
+#Sequência de tarefas de cada máquina: [job, início, fim], na ordem em que são processadas
+def taskSequences(processingOrder, OFlat, TFlat, J: int, M: int, active: bool = False) -> List[List[List[int]]]:
+    return Schedule(processingOrder, OFlat, TFlat, J, M, active).taskSequences()
@@ -0,0 +1,130 @@
+import json, multiprocessing, queue, time
+from typing import Callable, List
+
+#Evento publicado pelo solver
+#kind: "best" (nova melhor solução), "worst" (nova pior solução do GA), "progress" (amostra periódica),
+#"control" (decisão do controle da perturbação do ILS, descrita em status) ou "final"
+#evaluations conta as decodificações; cacheHits, as soluções que vieram do cache sem decodificar (só nos eventos
+#"progress" e "final")
+class ImprovementEvent():
+    __slots__ = ("elapsed", "iteration", "makespan", "solution", "evaluations", "source", "kind", "status", "cacheHits")
+
+    def __init__(self, elapsed: float, iteration: int, makespan: int, solution: List[int] = None, evaluations: int = None, source: int = 0, kind: str = "best", status: str = None, cacheHits: int = None):
+        self.elapsed = elapsed
+        self.iteration = iteration
+        self.makespan = makespan
+        self.solution = solution
+        self.evaluations = evaluations
+        self.source = source
+        self.kind = kind
+        self.status = status
+        self.cacheHits = cacheHits
+
+    def __str__(self):
+        return f"[{round(self.elapsed, 3)}s] {self.kind} - Iteration: {self.iteration} - Makespan: {self.makespan}"
+
+    def toDict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+#Canal de eventos entre o solver (que publica) e quem o chamou (que consome)
+#Com crossProcess, os eventos passam por uma multiprocessing.Queue e só são entregues aos callbacks e ao arquivo
+#JSON-lines quando o processo pai chama poll/wait; sem crossProcess, são entregues na hora
+class EventStream():
+    def __init__(self, jsonLinesPath: str = None, crossProcess: bool = True):
+        self.start = time.time()
+        self.queue = multiprocessing.Queue() if crossProcess else None
+        self.jsonLinesPath = jsonLinesPath
+        self.file = None
+        self.callbacks : List[Callable[[ImprovementEvent], None]] = []
+        #Quem publica (ex: índice do processo do ILS paralelo ou da ilha do GA)
+        self.source = 0
+        #Linha do tempo de todos os eventos recebidos
+        self.events : List[ImprovementEvent] = []
+
+    #Só a fila vai para os processos filhos
+    def __getstate__(self):
+        return {"start": self.start, "queue": self.queue}
+
+    def __setstate__(self, state):
+        self.__init__(crossProcess = False)
+        self.start = state["start"]
+        self.queue = state["queue"]
+
+    def subscribe(self, callback: Callable[[ImprovementEvent], None]):
+        self.callbacks.append(callback)
+
+    def publish(self, iteration: int, makespan: int, solution: List[int] = None, evaluations: int = None, kind: str = "best", status: str = None, cacheHits: int = None):
+        event = ImprovementEvent(time.time() - self.start, iteration, makespan, None if solution is None else list(solution), evaluations, self.source, kind, status, cacheHits)
+
+        if self.queue is not None:
+            self.queue.put(event)
+        else:
+            self.dispatch(event)
+
+    def dispatch(self, event: ImprovementEvent):
+        self.events.append(event)
+
+        if self.jsonLinesPath is not None:
+            if self.file is None:
+                self.file = open(self.jsonLinesPath, "a")
+            self.file.write(json.dumps(event.toDict()) + "\n")
+            self.file.flush()
+
+        for callback in self.callbacks:
+            callback(event)
+
+    #Espera até timeout segundos pelo próximo evento e entrega todos os que estiverem na fila
+    def poll(self, timeout: float = 0):
+        if self.queue is None:
+            return
+
+        try:
+            event = self.queue.get(timeout = timeout) if timeout > 0 else self.queue.get_nowait()
+        except queue.Empty:
+            return
+
+        while True:
+            self.dispatch(event)
+            try:
+                event = self.queue.get_nowait()
+            except queue.Empty:
+                return
+
+    #Consome eventos enquanto algum dos processos estiver vivo, por no máximo timeLimit segundos (-1 para sem limite)
+    def wait(self, processes: List[multiprocessing.Process], timeLimit: float = -1):
+        deadline = None if timeLimit == -1 else time.time() + timeLimit
+
+        while any(p.is_alive() for p in processes):
+            remaining = 0.1 if deadline is None else min(0.1, deadline - time.time())
+            if remaining <= 0:
+                break
+            self.poll(remaining)
+
+        self.poll()
+
+    def best(self) -> ImprovementEvent:
+        return min((event for event in self.events if event.kind == "best"), key = lambda event: event.makespan, default = None)
+
+    def last(self, kind: str) -> ImprovementEvent:
+        return next((event for event in reversed(self.events) if event.kind == kind), None)
+
+    def close(self):
+        self.poll()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+#Limita a frequência de uma ação (como imprimir o progresso) a uma vez a cada interval segundos
+class RateLimiter():
+    __slots__ = ("interval", "next")
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.next = 0.0
+
+    def due(self) -> bool:
+        now = time.monotonic()
+        if now < self.next:
+            return False
+        self.next = now + self.interval
+        return True
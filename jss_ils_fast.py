@@ -1,47 +1,60 @@
-import time
+import math, time
 from typing import List
-import multiprocessing, random
+import multiprocessing
+from array import array
+from jss_events import EventStream, RateLimiter
+from jss_bounds import lowerBound
+from jss_budget import Budget
+from jss_cache import EvaluationCache
+from jss_decoder import DECODERS, Schedule, activeMakespan, canonicalKey, makespan, makespanFrom, prefixStates
+from jss_instances import ProblemInstance, readInstance
+from jss_random import RandomStream, makeRandom
 
+#O decodificador em lote é opcional e depende do NumPy
+try:
+    from jss_batch_decoder import asArrays, decodeBatch, swapPairs, swapPairsBatch
+except ImportError:
+    decodeBatch = None
 
+
+#A ordem de processamento é um array de inteiros e o problema (J, M, O, T) fica só no contexto
+#O escalonamento da ordem é decodificado uma vez e guardado até a ordem mudar
+#Quem altera processingOrder no lugar (como os movimentos) precisa chamar invalidate()
 class SolutionJSS():
-    def __init__(self, J: int, M: int, O: List[List[int]], T: List[List[int]]):
-        self.processingOrder = []
-        self.J = J
-        self.M = M
-        self.O = O
-        self.T = T
+    __slots__ = ("order", "context", "cachedSchedule")
+    
+    def __init__(self, context: 'ContextJSS'):
+        self.order = array("i")
+        self.context = context
+        self.cachedSchedule : Schedule = None
         
-    def __str__(self):
-        solution = self.processingOrder
+    @property
+    def processingOrder(self):
+        return self.order
+    
+    @processingOrder.setter
+    def processingOrder(self, processingOrder: List[int]):
+        self.order = processingOrder
+        self.cachedSchedule = None
         
-        currentOperation = [0 for _ in range(self.J)]
-        machineTime = [0 for _ in range(self.M)]
-        jobTime = [0 for _ in range(self.J)]
+    def invalidate(self):
+        self.cachedSchedule = None
         
-        taskSeq = [[] for _ in range(self.M)]
+    def schedule(self) -> Schedule:
+        if self.cachedSchedule is None:
+            context = self.context
+            self.cachedSchedule = Schedule(self.order, context.OFlat, context.TFlat, context.J, context.M, context.decoder == "active")
+        return self.cachedSchedule
         
-        resp = ""
+    def __str__(self):
+        context = self.context
         
-        for i in range(len(solution)):
-            job = solution[i]
-            machine = self.O[job][currentOperation[job]]
-            time = self.T[job][machine]
-            
-            if machineTime[machine] > jobTime[job]:
-                taskSeq[machine].append([job, machineTime[machine], machineTime[machine] + time])
-                
-                machineTime[machine] += time
-                jobTime[job] = machineTime[machine]
-            else:
-                taskSeq[machine].append([job, jobTime[job], jobTime[job] + time])
-                
-                jobTime[job] += time
-                machineTime[machine] = jobTime[job]
-            
-            currentOperation[job] += 1
+        taskSeq = self.schedule().taskSequences()
         
-        resp += f"\n{self.processingOrder}"
-        for m in range(self.M):
+        resp = ""
+        
+        resp += f"\n{list(self.processingOrder)}"
+        for m in range(context.M):
             resp += f"\nMachine {m}: \n"
             for task in taskSeq[m]:
                 resp += f"Job {task[0]}: [{task[1]} - {task[2]}] "
@@ -49,10 +62,10 @@ class SolutionJSS():
         return resp
     
     def setSolution(self, solution: List[int]):
-        self.processingOrder = solution.copy()
+        self.processingOrder = array("i", solution)
 
 class ContextJSS():
-    def __init__(self):
+    def __init__(self, batchDecoder: bool = False, neighbourhood: str = "swap", decoder: str = "semiactive", cacheMemory: float = 0, seed: int = None, randomBatch: int = 0, batchChunk: int = 1024, moveSelection: str = "best", acceptance: str = "walk", perturbation: str = "escalate", descent: bool = False):
         #Numero de Jobs
         self.J : int = 0
         #Numero de Máquinas
@@ -61,25 +74,86 @@ class ContextJSS():
         self.T : List[List[int]] = []
         #Ordem de Processamento
         self.O : List[List[int]] = []
+        #O e T planos, indexados por job*M + operação (máquina e tempo de cada operação)
+        self.OFlat = array("i")
+        self.TFlat = array("i")
+        #Limite inferior do makespan (jss_bounds): uma solução que chega nele é ótima e o solver para
+        self.lowerBound = 0
+        #Avalia a vizinhança em lote com o NumPy, em blocos de até batchChunk trocas
+        #Cada bloco ocupa cerca de 8 * batchChunk * J*M bytes: blocos maiores gastam menos tempo no interpretador e mais memória
+        self.batchDecoder = batchDecoder
+        self.batchChunk = batchChunk
+        #Vizinhança do localSearch: "swap" (todas as trocas), "N5" ou "N7" (blocos do caminho crítico)
+        self.neighbourhood = neighbourhood
+        #Movimento escolhido pelo localSearch: "best" (melhor da vizinhança) ou "first" (primeiro que melhora)
+        self.moveSelection = moveSelection
+        #O localSearch desce até um ótimo local em vez de fazer uma única passada pela vizinhança
+        self.descent = descent
+        #Don't look bits da descida na vizinhança "swap" e a distância, em posições, em que um movimento aplicado os apaga
+        self.dontLookBits = True
+        self.dontLookRadius = 1
+        #Decodificador da ordem de processamento: "semiactive" ou "active"
+        self.decoder = decoder
+        #Cache dos makespans das decodificações completas, com até cacheMemory MB (None com 0)
+        self.cache = EvaluationCache(cacheMemory) if cacheMemory > 0 else None
+        #Número de soluções avaliadas (decodificações completas ou incrementais, sem contar os acertos do cache)
+        self.evaluations = 0
+        #Intervalo mínimo, em segundos, entre duas impressões do progresso
+        self.printInterval = 1.0
+        #Imprime o progresso no stdout (os eventos "progress" são publicados mesmo sem imprimir)
+        self.verbose = True
+        #Gerador de números aleatórios do solver (None sorteia a semente); com randomBatch > 0 os sorteios saem de um buffer desse tamanho
+        self.randomBatch = randomBatch
+        self.rng : RandomStream = makeRandom(seed, randomBatch)
+        #Orçamento da execução atual (definido pelo runILS/runTabu); o localSearch também para quando ele acaba
+        self.budget = Budget()
+        #Critério de aceitação do runILS, que decide de onde parte a próxima perturbação:
+        #"walk": da solução perturbada, voltando para a melhor com rollbackChance (critério original)
+        #"better": do ótimo local, se ele não for pior que a solução atual
+        #"annealing": do ótimo local, aceitando um pior com probabilidade exp(-diferença/temperatura)
+        #"restart": como o "better", mas recomeça de uma solução aleatória depois de restartStagnation iterações sem melhorar a atual
+        self.acceptance = acceptance
+        #Temperatura inicial do "annealing" como fração do makespan inicial e o seu fator de resfriamento por iteração
+        self.annealingTemperature = 0.01
+        self.annealingCooling = 0.995
+        self.restartStagnation = 500
+        #Controle da força da perturbação (k): "escalate" ou "adaptive" (ver PerturbationController)
+        self.perturbation = perturbation
+        #Iterações entre duas decisões do controle "adaptive"
+        self.perturbationWindow = 20
+        
+        if batchDecoder and decodeBatch is None:
+            raise ImportError("O decodificador em lote precisa do NumPy")
+        if neighbourhood not in ("swap", "N5", "N7"):
+            raise ValueError(f"Vizinhança desconhecida: {neighbourhood}")
+        if moveSelection not in ("best", "first"):
+            raise ValueError(f"Seleção de movimento desconhecida: {moveSelection}")
+        if acceptance not in ("walk", "better", "annealing", "restart"):
+            raise ValueError(f"Critério de aceitação desconhecido: {acceptance}")
+        if perturbation not in ("escalate", "adaptive"):
+            raise ValueError(f"Controle de perturbação desconhecido: {perturbation}")
+        if decoder not in DECODERS:
+            raise ValueError(f"Decodificador desconhecido: {decoder}")
+        if batchDecoder and decoder == "active":
+            raise ValueError("O decodificador em lote só gera escalonamentos semi-ativos")
         
     def load(self, fileName: str):
-        file = open(fileName, "r")
-        self.J, self.M = list(map(int,file.readline().split()))
+        self.loadInstance(readInstance(fileName))
         
-        self.T = [[0 for _ in range(self.M)] for _ in range(self.J)]
-        self.O = [[0 for _ in range(self.M)] for _ in range(self.J)]
+    def setSeed(self, seed: int):
+        self.rng = makeRandom(seed, self.randomBatch)
         
-        for i in range(self.J):
-            line = list(map(int, file.readline().split()))
-            lastMachine = -1
-            for j in range(self.M * 2):
-                if j % 2 == 0:
-                    self.O[i][j // 2] = line[j]
-                    lastMachine = line[j]
-                else:
-                    self.T[i][lastMachine] = line[j]
-                    
-        file.close()
+    def loadInstance(self, instance: ProblemInstance):
+        self.J, self.M = instance.J, instance.M
+        self.O, self.T = instance.O, instance.T
+        self.OFlat, self.TFlat = instance.flatArrays()
+        self.lowerBound = lowerBound(self.O, self.T)
+        
+        if self.batchDecoder:
+            self.OArray, self.TArray = asArrays(self.O, self.T)
+            
+        if self.cache is not None:
+            self.cache.resize(self.J * self.M)
     
     def __str__(self):
         resp = f"Number of Jobs: {self.J} x Number of Machines: {self.M}\n\n"
@@ -94,85 +168,291 @@ class ContextJSS():
         return resp
     
     def minimize(self, solution: SolutionJSS):
-        processingOrder = solution.processingOrder
+        #Reaproveita o escalonamento já decodificado
+        if solution.cachedSchedule is not None:
+            return solution.cachedSchedule.makespan
         
-        #Guarda informações sobre o tempo atual de cada máquia e de cada job
-        currentOperation = [0 for _ in range(self.J)]
-        machineTime = [0 for _ in range(self.M)]
-        jobTime = [0 for _ in range(self.J)]
+        return self.evaluateOrder(solution.processingOrder)
+    
+    #Soluções que vieram do cache sem decodificar (não entram em evaluations)
+    def cacheHits(self) -> int:
+        return self.cache.hits if self.cache is not None else 0
+    
+    #Decodificação completa de uma ordem, passando pelo cache quando ele está ligado
+    def evaluateOrder(self, processingOrder: List[int]):
+        key = None
+        if self.cache is not None:
+            key = canonicalKey(processingOrder, self.OFlat, self.J, self.M)
+            score = self.cache.get(key)
+            if score is not None:
+                return score
         
-        maxTime = 0
+        self.evaluations += 1
         
-        for i in range(len(processingOrder)):
-            job = processingOrder[i]
-            machine = self.O[job][currentOperation[job]]
-            time = self.T[job][machine]
-            
-            if machineTime[machine] > jobTime[job]:
-                machineTime[machine] += time
-                jobTime[job] = machineTime[machine]
-            else:
-                jobTime[job] += time
-                machineTime[machine] = jobTime[job]
-                
-                
-            maxTime = max(maxTime, machineTime[machine])
+        if self.decoder == "active":
+            score = activeMakespan(processingOrder, self.OFlat, self.TFlat, self.J, self.M)
+        else:
+            score = makespan(processingOrder, self.OFlat, self.TFlat, self.J, self.M)
             
-            currentOperation[job] += 1
+        if key is not None:
+            self.cache.put(key, score)
             
-        return maxTime
+        return score
+    
+    #Blocos críticos da solução: sequências máximas de operações consecutivas do caminho crítico na mesma máquina
+    #Cada bloco é a lista das posições das suas operações em processingOrder
+    def criticalBlocks(self, solution: SolutionJSS):
+        return solution.schedule().criticalBlocks()
     
     def generateInitialSolution(self):
-        solution = SolutionJSS(self.J, self.M, self.O, self.T)
+        solution = SolutionJSS(self)
         
-        solution.processingOrder = [i for i in range(0, self.J) for _ in range(self.M)]
+        processingOrder = array("i", [i for i in range(0, self.J) for _ in range(self.M)])
         
-        random.shuffle(solution.processingOrder)
+        self.rng.shuffle(processingOrder)
+        
+        solution.processingOrder = processingOrder
         
         return solution
     
+    #Uma passada pela vizinhança ou, com descent, a descida até um ótimo local
+    #A solução recebida não é alterada; retorna a melhor solução encontrada e o seu makespan
+    #Com o orçamento esgotado, a busca para no meio da vizinhança e retorna a melhor solução encontrada até ali
     def localSearch(self, solution: SolutionJSS):
+        if self.descent:
+            return self.localDescent(solution)
+        
+        return self.neighbourhoodPass(solution)
+    
+    def neighbourhoodPass(self, solution: SolutionJSS):
+        if self.batchDecoder and self.neighbourhood == "swap":
+            return self.localSearchBatch(solution)
         
-        bestSolution = SolutionJSS(self.J, self.M, self.O, self.T)
+        bestSolution = SolutionJSS(self)
         bestSolution.setSolution(solution.processingOrder)
         
-        bestScore = self.minimize(bestSolution)
+        #A solução é sempre restaurada após cada movimento, então os prefixos calculados aqui valem para toda a busca
+        evaluator = IncrementalEvaluator(self)
+        evaluator.setBase(solution.processingOrder)
         
-        iterator = NSIterator(0, 1)
+        bestScore = evaluator.baseScore()
+        
+        if self.neighbourhood == "swap":
+            iterator = NSIterator(0, 1)
+        else:
+            iterator = NSCriticalIterator(self, solution, self.neighbourhood)
         iterator.first()
+        
+        budget = self.budget
+        checked = 0
             
         while not iterator.isDone(self):
+            checked += 1
+            if checked & 63 == 0 and budget.exhausted(self.evaluations):
+                break
+            
             move = iterator.current()
                 
             if move.canBeApplied(self, solution):
                 returnMove = move.apply(self, solution)
-                newScore = self.minimize(solution)
+                newScore = evaluator.evaluate(solution.processingOrder, min(move.i, move.j))
+                
+                improved = newScore < bestScore
                 
-                if newScore < bestScore:
+                if improved:
                     bestScore = newScore
                     bestSolution.setSolution(solution.processingOrder)
                     
                 returnMove.apply(self, solution)    
                 
+                if improved and self.moveSelection == "first":
+                    break
+                
             iterator.next(self)
                 
         
         return bestSolution, bestScore
     
+    #Descida: aplica o movimento escolhido pelo moveSelection (o primeiro ou o melhor que melhora) e busca de novo a partir
+    #da solução melhorada, até nenhum movimento melhorar
+    #Na vizinhança "swap" sem o lote, usa o swapDescent; nas outras repete a passada inteira, já que o caminho crítico
+    #(N5/N7) muda a cada movimento
+    def localDescent(self, solution: SolutionJSS):
+        if self.neighbourhood == "swap" and not self.batchDecoder:
+            return self.swapDescent(solution)
+        
+        bestSolution, bestScore = self.neighbourhoodPass(solution)
+        
+        while not self.budget.exhausted(self.evaluations):
+            nextSolution, nextScore = self.neighbourhoodPass(bestSolution)
+            if nextScore >= bestScore:
+                break
+            bestSolution, bestScore = nextSolution, nextScore
+            
+        return bestSolution, bestScore
+    
+    #Descida na vizinhança de trocas com don't look bits
+    #Cada posição é a âncora das trocas com todas as outras, e as âncoras e as posições trocadas com elas são visitadas em
+    #ordem aleatória; uma troca com uma âncora já varrida na mesma passada foi avaliada por ela e é pulada, então cada
+    #par é avaliado uma única vez por passada
+    #Uma âncora sem troca que melhore recebe o bit e é pulada até que um movimento seja aplicado a até dontLookRadius
+    #posições dela (com dontLookBits desligado, todas as âncoras são visitadas em toda passada)
+    #"first" aplica a primeira troca que melhora e recomeça a varredura; "best" aplica a melhor troca de cada passada
+    #As trocas são feitas direto no array, sem os objetos Move, porque este é o laço mais quente do ILS
+    def swapDescent(self, solution: SolutionJSS):
+        rng = self.rng
+        budget = self.budget
+        first = self.moveSelection == "first"
+        
+        bestSolution = SolutionJSS(self)
+        bestSolution.setSolution(solution.processingOrder)
+        order = bestSolution.processingOrder
+        n = len(order)
+        
+        evaluator = IncrementalEvaluator(self)
+        evaluator.setBase(order)
+        bestScore = evaluator.baseScore()
+        
+        dontLook = bytearray(n)
+        anchors = list(range(n))
+        partners = list(range(n))
+        checked = 0
+        
+        while True:
+            passScore, passMove = bestScore, None
+            rng.shuffle(anchors)
+            #Âncoras já varridas nesta passada e posições de alguma troca que melhora (avaliada por qualquer uma das duas)
+            scanned = bytearray(n)
+            improving = bytearray(n)
+            
+            for i in anchors:
+                if dontLook[i]:
+                    continue
+                
+                rng.shuffle(partners)
+                
+                for j in partners:
+                    if scanned[j] or order[i] == order[j]:
+                        continue
+                    
+                    checked += 1
+                    if checked & 63 == 0 and budget.exhausted(self.evaluations):
+                        return bestSolution, bestScore
+                    
+                    order[i], order[j] = order[j], order[i]
+                    score = evaluator.evaluate(order, min(i, j))
+                    order[i], order[j] = order[j], order[i]
+                    
+                    if score < bestScore:
+                        improving[i] = improving[j] = 1
+                        if score < passScore:
+                            passScore, passMove = score, (i, j)
+                            if first:
+                                break
+                
+                scanned[i] = 1
+                if first and passMove is not None:
+                    break
+                if not improving[i] and self.dontLookBits:
+                    dontLook[i] = 1
+                    
+            if passMove is None:
+                return bestSolution, bestScore
+            
+            i, j = passMove
+            order[i], order[j] = order[j], order[i]
+            bestSolution.invalidate()
+            bestScore = passScore
+            evaluator.setBase(order)
+            
+            radius = self.dontLookRadius
+            for position in (i, j):
+                for near in range(max(0, position - radius), min(n, position + radius + 1)):
+                    dontLook[near] = 0
+    
+    #Mesma vizinhança do localSearch, decodificada em lote com o NumPy
+    #As trocas (i, j) que mudam a ordem são ordenadas por i e divididas em blocos de até batchChunk linhas
+    #Todas as linhas de um bloco são iguais à ordem base antes da menor posição i do bloco, então o bloco inteiro é
+    #decodificado a partir do prefixo nessa posição
+    #Com moveSelection "first", a busca para no primeiro bloco que tem uma troca que melhora e fica com a primeira delas
+    def localSearchBatch(self, solution: SolutionJSS):
+        bestSolution = SolutionJSS(self)
+        bestSolution.setSolution(solution.processingOrder)
+        
+        evaluator = IncrementalEvaluator(self)
+        evaluator.setBase(solution.processingOrder)
+        
+        bestScore = evaluator.baseScore()
+        
+        iIndex, jIndex = swapPairs(solution.processingOrder)
+        
+        for chunk in range(0, len(iIndex), self.batchChunk):
+            if self.budget.exhausted(self.evaluations):
+                break
+            
+            chunkI, chunkJ = iIndex[chunk:chunk + self.batchChunk], jIndex[chunk:chunk + self.batchChunk]
+            start = int(chunkI[0])
+            
+            batch = swapPairsBatch(solution.processingOrder, chunkI, chunkJ)
+            currentOperation = [operation - job * self.M for job, operation in enumerate(evaluator.nextOperations[start])]
+            initialState = (evaluator.machineTimes[start], evaluator.jobTimes[start], currentOperation)
+            
+            scores = decodeBatch(batch, self.OArray, self.TArray, start, initialState)
+            self.evaluations += len(batch)
+            
+            if self.moveSelection == "first":
+                improving = (scores < bestScore).nonzero()[0]
+                if len(improving):
+                    bestScore = int(scores[improving[0]])
+                    bestSolution.setSolution(batch[improving[0]].tolist())
+                    break
+                continue
+            
+            best = int(scores.argmin())
+            
+            if scores[best] < bestScore:
+                bestScore = int(scores[best])
+                bestSolution.setSolution(batch[best].tolist())
+        
+        return bestSolution, bestScore
+    
     def applyPertubation(self, solution: SolutionJSS, k: int):
         for _ in range(k):
             move = NSSwapMove.randomMove(self, solution)
             move.apply(self, solution)
             
-    def runILS(self, ILSMaxIterations: int, rollbackChance: float, k: int, goal: int,return_dict: dict):
-        kLinha = k
+    #Critérios "better", "annealing" e "restart": o ótimo local (candidateScore) substitui a solução atual?
+    def acceptSolution(self, candidateScore: int, currentScore: int, temperature: float) -> bool:
+        if candidateScore <= currentScore:
+            return True
+        if self.acceptance == "annealing" and temperature > 0:
+            return self.rng.random() < math.exp((currentScore - candidateScore) / temperature)
+        return False
+            
+    #return_dict: recebe a melhor ordem e o seu makespan a cada melhoria (opcional)
+    #incumbent: melhor solução compartilhada com os outros processos do ILS paralelo (None quando roda sozinho)
+    #restartFromIncumbent: no rollback, volta para a melhor solução global se ela for melhor que a local
+    #events: recebe um evento a cada melhoria, uma amostra do progresso a cada printInterval segundos, um evento "control"
+    #a cada decisão do controle da perturbação ou recomeço, e um evento "final" com o motivo da parada
+    #timeLimit e maxEvaluations: orçamento em segundos e em avaliações (-1 para sem limite), verificado dentro da busca
+    #Retorna a melhor solução e o seu makespan
+    def runILS(self, ILSMaxIterations: int, rollbackChance: float, k: int, goal: int,return_dict: dict = None, incumbent: 'SharedIncumbent' = None, restartFromIncumbent: bool = False, events: EventStream = None, timeLimit: float = -1, maxEvaluations: int = -1):
+        progress = RateLimiter(self.printInterval)
+        budget = self.budget = Budget(timeLimit, maxEvaluations).start(self.evaluations)
         
         s = self.generateInitialSolution()
 
         bestSolution, bestScore = self.localSearch(s)
         
-        return_dict["best"] = bestSolution.processingOrder
-        return_dict["bestScore"] = bestScore
+        if return_dict is not None:
+            return_dict["best"] = bestSolution.processingOrder
+            return_dict["bestScore"] = bestScore
+            
+        if events is not None:
+            events.publish(0, bestScore, bestSolution.processingOrder, self.evaluations)
+        
+        if incumbent is not None:
+            incumbent.publish(bestSolution.processingOrder, bestScore)
         
         currentIteration = 0
         bestIteration = 0
@@ -180,40 +460,279 @@ class ContextJSS():
         
         ILSMaxIterations = float("inf") if ILSMaxIterations == -1 else ILSMaxIterations
 
-        k = 1
+        #No "adaptive", k fica abaixo de J*M/10 para não gastar o tempo subindo de soluções quase aleatórias
+        kMax = (self.J * self.M) // (2 if self.perturbation == "escalate" else 10)
+        controller = PerturbationController(self.perturbation, k, kMax, self.perturbationWindow)
+        status = "ITERATION_LIMIT"
 
-        solution = SolutionJSS(context.J, context.M, context.O, context.T)
+        solution = SolutionJSS(self)
         solution.setSolution(bestSolution.processingOrder)
+        
+        #Solução de onde parte a próxima perturbação e o seu makespan (no "walk", o makespan do último ótimo local)
+        currentOrder = array("i", bestSolution.processingOrder)
+        currentScore = bestScore
+        #Última iteração em que o ótimo local melhorou a solução atual (para o "restart")
+        currentImprovedIteration = 0
+        temperature = self.annealingTemperature * bestScore
 
         while(currentIteration - bestIteration < ILSMaxIterations):
+            if bestScore <= self.lowerBound:
+                status = "OPTIMAL"
+                break
+            
+            if goal != -1 and bestScore <= goal:
+                status = "GOAL"
+                break
+            
+            #Outro processo já achou uma solução ótima ou atingiu o objetivo
+            if incumbent is not None and incumbent.score.value <= self.lowerBound:
+                status = "OPTIMAL"
+                break
+            
+            if incumbent is not None and goal != -1 and incumbent.score.value <= goal:
+                status = "GOAL"
+                break
+            
+            if budget.exhausted(self.evaluations):
+                status = budget.status
+                break
+            
             currentIteration += 1
 
-            if random.random() < rollbackChance:
+            if self.rng.random() < rollbackChance:
+                if restartFromIncumbent and incumbent is not None and incumbent.score.value < bestScore:
+                    incumbentOrder, incumbentScore = incumbent.read()
+                    bestSolution.setSolution(incumbentOrder)
+                    bestScore = incumbentScore
+                    
                 solution.setSolution(bestSolution.processingOrder)
+                currentOrder, currentScore = array("i", bestSolution.processingOrder), bestScore
 
-            self.applyPertubation(solution, k)
+            self.applyPertubation(solution, controller.k)
 
             localBestSolution, localBestScore = self.localSearch(solution)
 
-            print(f"Iteration: {currentIteration} - NSScore: {localBestScore} - BestScore: {bestScore}")
+            if progress.due():
+                if self.verbose:
+                    print(f"Iteration: {currentIteration} - NSScore: {localBestScore} - BestScore: {bestScore} - k: {controller.k}")
+                    if self.cache is not None:
+                        print(self.cache)
+                
+                if events is not None:
+                    events.publish(currentIteration, bestScore, None, self.evaluations, "progress", cacheHits = self.cacheHits())
+                    
+            improvedBest = localBestScore < bestScore
+            improvedCurrent = localBestScore < currentScore
 
-            if localBestScore < bestScore:
+            if improvedBest:
                 bestScore = localBestScore
                 bestSolution.setSolution(localBestSolution.processingOrder)
                 
-                return_dict["best"] = bestSolution
-                return_dict["bestScore"] = bestScore
+                if return_dict is not None:
+                    return_dict["best"] = bestSolution.processingOrder
+                    return_dict["bestScore"] = bestScore
+                    
+                if events is not None:
+                    events.publish(currentIteration, bestScore, bestSolution.processingOrder, self.evaluations)
+                
+                if incumbent is not None:
+                    incumbent.publish(bestSolution.processingOrder, bestScore)
                 
                 bestIteration = currentIteration
-                k = kLinha
                 
-                if goal != -1 and bestScore <= goal:
-                    break
+            if self.acceptance == "walk":
+                #A solução perturbada continua sendo a atual
+                currentScore = localBestScore
+            elif self.acceptSolution(localBestScore, currentScore, temperature):
+                solution.setSolution(localBestSolution.processingOrder)
+                currentOrder, currentScore = array("i", solution.processingOrder), localBestScore
+            else:
+                solution.setSolution(currentOrder)
                 
+            temperature *= self.annealingCooling
+            
+            if improvedCurrent:
+                currentImprovedIteration = currentIteration
+            elif self.acceptance == "restart" and currentIteration - currentImprovedIteration >= self.restartStagnation:
+                solution, currentScore = self.localSearch(self.generateInitialSolution())
+                currentOrder = array("i", solution.processingOrder)
+                currentImprovedIteration = currentIteration
+                
+                if events is not None:
+                    events.publish(currentIteration, bestScore, None, self.evaluations, "control", f"restart: {currentScore}")
+                
+            decision = controller.update(improvedBest, improvedCurrent)
+            
+            if decision is not None and events is not None:
+                events.publish(currentIteration, bestScore, None, self.evaluations, "control", decision)
+                
+        if events is not None:
+            events.publish(currentIteration, bestScore, None, self.evaluations, "final", status, self.cacheHits())
+            
+        return bestSolution, bestScore
+                
+    #Roda nWorkers processos do ILS, compartilhando a melhor solução
+    #Cada processo usa o fluxo self.rng.spawn(índice do processo), então a mesma semente reproduz os mesmos fluxos
+    #Cada processo para sozinho no tempo limite (ou com maxEvaluations avaliações), então nenhum é encerrado à força
+    #Retorna a melhor ordem e o seu makespan quando todos terminam; a exceção de um processo que falhar é repassada
+    #seed: substitui a semente do contexto (None mantém a atual)
+    #events: cada processo publica os seus eventos com source = índice do processo
+    def runParallelILS(self, nWorkers: int, timeLimit: int, ILSMaxIterations: int, rollbackChance: float, k: int, goal: int, restartFromIncumbent: bool = False, seed: int = None, events: EventStream = None, maxEvaluations: int = -1):
+        incumbent = SharedIncumbent(self.J * self.M)
+        
+        if seed is not None:
+            self.setSeed(seed)
+        
+        args = [(self, w, ILSMaxIterations, rollbackChance, k, goal, restartFromIncumbent, timeLimit, maxEvaluations) for w in range(nWorkers)]
+        
+        pool = multiprocessing.Pool(nWorkers, initializer = initILSWorker, initargs = (incumbent, events))
+        results = pool.starmap_async(runILSWorker, args)
+        
+        try:
+            if events is not None:
+                while not results.ready():
+                    events.poll(0.1)
+                events.poll()
             else:
-                k = min(k + 1, (context.J * context.M) // 2) 
+                results.wait()
+            
+            #Repassa para quem chamou a exceção de um processo que falhou
+            results.get()
+        finally:
+            pool.close()
+            pool.join()
+        
+        bestSolution, bestScore = incumbent.read()
+        if bestScore == SharedIncumbent.empty:
+            raise RuntimeError("Nenhum processo do ILS publicou uma solução")
+        
+        return bestSolution, bestScore
+    
+#Força da perturbação (k) do runILS
+#"escalate": começa em 1, cresce 1 a cada iteração sem melhorar a melhor solução (até kMax) e volta para o k inicial
+#quando ela melhora (controle original)
+#"adaptive": a cada window iterações mede a taxa de melhoria (fração das iterações em que o ótimo local foi melhor que
+#a solução de onde a perturbação partiu); abaixo de lowRate a busca está presa e k aumenta, acima de highRate k diminui
+#k fica entre 1 e kMax
+#update() retorna a decisão tomada, para ser registrada, ou None
+class PerturbationController():
+    __slots__ = ("mode", "kInitial", "k", "kMax", "window", "lowRate", "highRate", "iterations", "improvements")
+    
+    def __init__(self, mode: str, k: int, kMax: int, window: int = 20, lowRate: float = 0.05, highRate: float = 0.2):
+        self.mode = mode
+        self.kInitial = k
+        self.kMax = max(k, kMax)
+        self.k = 1 if mode == "escalate" else k
+        self.window = window
+        self.lowRate = lowRate
+        self.highRate = highRate
+        self.iterations = 0
+        self.improvements = 0
+        
+    def update(self, improvedBest: bool, improvedCurrent: bool) -> str:
+        if self.mode == "escalate":
+            self.k = self.kInitial if improvedBest else min(self.k + 1, self.kMax)
+            return None
+        
+        self.iterations += 1
+        self.improvements += improvedCurrent
+        
+        if self.iterations < self.window:
+            return None
+        
+        rate = self.improvements / self.iterations
+        previous = self.k
+        
+        if rate < self.lowRate:
+            self.k = min(self.k + 1, self.kMax)
+        elif rate > self.highRate:
+            self.k = max(self.k - 1, 1)
+            
+        self.iterations = 0
+        self.improvements = 0
+        
+        return f"k: {previous} -> {self.k} (rate {rate:.2f})"
+    
+#Melhor solução global do ILS paralelo, em memória compartilhada (um inteiro e um vetor de J*M inteiros)
+class SharedIncumbent():
+    #Makespan enquanto nenhum processo publicou uma solução
+    empty = 2**31 - 1
+    
+    def __init__(self, n: int):
+        self.score = multiprocessing.Value("i", self.empty)
+        self.order = multiprocessing.Array("i", n, lock = False)
+        
+    def publish(self, processingOrder: List[int], score: int):
+        with self.score.get_lock():
+            if score < self.score.value:
+                self.score.value = score
+                self.order[:] = processingOrder
+                
+    def read(self):
+        with self.score.get_lock():
+            return list(self.order), self.score.value
+        
+#Cada processo do pool recebe a solução compartilhada e o canal de eventos uma única vez, ao ser criado
+sharedIncumbent : SharedIncumbent = None
+sharedEvents : EventStream = None
+
+def initILSWorker(incumbent: SharedIncumbent, events: EventStream):
+    global sharedIncumbent, sharedEvents
+    sharedIncumbent = incumbent
+    sharedEvents = events
+    
+def runILSWorker(context: 'ContextJSS', worker: int, ILSMaxIterations: int, rollbackChance: float, k: int, goal: int, restartFromIncumbent: bool, timeLimit: float, maxEvaluations: int):
+    context.rng = context.rng.spawn(worker)
+    
+    if sharedEvents is not None:
+        sharedEvents.source = worker
+    
+    _, bestScore = context.runILS(ILSMaxIterations, rollbackChance, k, goal, None, sharedIncumbent, restartFromIncumbent, sharedEvents, timeLimit, maxEvaluations)
+    
+    return bestScore
+    
+#Avaliação incremental do makespan
+#Guarda o estado da decodificação (tempo de cada máquina, tempo e operação atual de cada job) antes de cada posição da ordem base,
+#assim uma ordem que só difere da base a partir da posição i é decodificada de i em diante, com o mesmo resultado do minimize()
+#Na decodificação ativa uma operação pode ocupar um intervalo deixado por qualquer posição anterior, então a ordem é decodificada inteira
+class IncrementalEvaluator():
+    __slots__ = ("context", "machineTimes", "jobTimes", "nextOperations", "score")
+    
+    def __init__(self, context: 'ContextJSS'):
+        self.context = context
+        self.machineTimes : List[List[int]] = []
+        self.jobTimes : List[List[int]] = []
+        #Índice (job*M + operação) da próxima operação de cada job
+        self.nextOperations : List[List[int]] = []
+        self.score = 0
+        
+    def setBase(self, processingOrder: List[int]):
+        context = self.context
+        
+        if context.decoder == "active":
+            self.score = context.evaluateOrder(processingOrder)
+            return
+        
+        self.machineTimes, self.jobTimes, self.nextOperations = prefixStates(processingOrder, context.OFlat, context.TFlat, context.J, context.M)
+        #Os tempos das máquinas nunca diminuem, então o makespan é o maior tempo final entre as máquinas
+        self.score = int(max(self.machineTimes[-1], default = 0))
+            
+    def baseScore(self):
+        return self.score
+    
+    def evaluate(self, processingOrder: List[int], start: int):
+        context = self.context
+        
+        if context.decoder == "active":
+            return context.evaluateOrder(processingOrder)
+        
+        context.evaluations += 1
+        
+        return makespanFrom(processingOrder, start, self.machineTimes[start], self.jobTimes[start], self.nextOperations[start], context.OFlat, context.TFlat)
     
 class Move():
+    __slots__ = ()
+    
     def apply(self, context: 'ContextJSS', sol: SolutionJSS):
         pass
     def canBeApplied(self, context: 'ContextJSS', sol: SolutionJSS):
@@ -222,6 +741,8 @@ class Move():
         pass
     
 class SwapMove(Move):
+    __slots__ = ("i", "j")
+    
     def __init__(self, i: int, j: int):
         self.i = i
         self.j = j
@@ -233,6 +754,7 @@ class SwapMove(Move):
         
         sol.processingOrder[self.i] = jobJ
         sol.processingOrder[self.j] = jobI
+        sol.invalidate()
         
         return SwapMove(self.j, self.i)
     def canBeApplied(self, context: 'ContextJSS', sol: 'SolutionJSS'):
@@ -240,15 +762,67 @@ class SwapMove(Move):
     def eq(self, context, m2: 'SwapMove'):
         return (self.i == m2.i) and (self.j == m2.j)
     
+#Move a operação da posição i para junto da posição j sem mudar a ordem relativa das operações de um mesmo job
+#Se i > j, a operação (com as operações anteriores do seu job entre j e i) passa para antes da posição j
+#Se i < j, a operação (com as operações seguintes do seu job entre i e j) passa para depois da posição j
+class ShiftMove(Move):
+    __slots__ = ("i", "j")
+    
+    def __init__(self, i: int, j: int):
+        self.i = i
+        self.j = j
+    def __str__(self):
+        return f"ShiftMove({self.i},{self.j})"
+    def apply(self, context: 'ContextJSS', sol: SolutionJSS):
+        start, end = min(self.i, self.j), max(self.i, self.j)
+        segment = sol.processingOrder[start:end + 1]
+        job = sol.processingOrder[self.i]
+        
+        jobGenes = [gene for gene in segment if gene == job]
+        otherGenes = [gene for gene in segment if gene != job]
+        
+        if self.i > self.j:
+            sol.processingOrder[start:end + 1] = array("i", jobGenes + otherGenes)
+        else:
+            sol.processingOrder[start:end + 1] = array("i", otherGenes + jobGenes)
+        sol.invalidate()
+            
+        return RestoreMove(start, segment)
+    def canBeApplied(self, context: 'ContextJSS', sol: 'SolutionJSS'):
+        return self.i != self.j
+    def eq(self, context, m2: 'ShiftMove'):
+        return (self.i == m2.i) and (self.j == m2.j)
+    
+#Inverso do ShiftMove: devolve o trecho original a partir da posição i
+class RestoreMove(Move):
+    __slots__ = ("i", "j", "segment")
+    
+    def __init__(self, i: int, segment: List[int]):
+        self.i = i
+        self.j = i + len(segment) - 1
+        self.segment = segment
+    def __str__(self):
+        return f"RestoreMove({self.i},{self.j})"
+    def apply(self, context: 'ContextJSS', sol: SolutionJSS):
+        segment = sol.processingOrder[self.i:self.j + 1]
+        sol.processingOrder[self.i:self.j + 1] = self.segment
+        sol.invalidate()
+        return RestoreMove(self.i, segment)
+    def canBeApplied(self, context: 'ContextJSS', sol: 'SolutionJSS'):
+        return True
+    def eq(self, context, m2: 'RestoreMove'):
+        return (self.i == m2.i) and (self.segment == m2.segment)
+    
 class NSSwapMove():
     @staticmethod
     def randomMove(context: 'ContextJSS', sol: SolutionJSS) -> SwapMove:
+        rng = context.rng
         solutionSize = len(sol.processingOrder) - 1
-        i = random.randint(0, solutionSize)
-        j = random.randint(0, solutionSize)
+        i = rng.randint(0, solutionSize)
+        j = rng.randint(0, solutionSize)
         
         while sol.processingOrder[i] == sol.processingOrder[j]:
-            j = random.randint(0, solutionSize)
+            j = rng.randint(0, solutionSize)
         
         return SwapMove(i, j)
     
@@ -272,6 +846,51 @@ class NSIterator():
     def current(self):
         return SwapMove(self.i, self.j)
     
+#Vizinhança N5/N7 sobre os blocos do caminho crítico da solução
+#N5: troca as duas primeiras e as duas últimas operações de cada bloco (exceto o início do primeiro bloco e o fim do último)
+#N7: move cada operação interna para o início e para o fim do bloco, e a primeira/última operação para cada posição interna
+class NSCriticalIterator():
+    def __init__(self, context: ContextJSS, solution: SolutionJSS, neighbourhood: str = "N5"):
+        self.moves : List[Move] = []
+        self.index = 0
+        
+        blocks = context.criticalBlocks(solution)
+        seen = set()
+        
+        for b in range(len(blocks)):
+            block = blocks[b]
+            size = len(block)
+            if size < 2:
+                continue
+            
+            candidates = []
+            if neighbourhood == "N5":
+                if b > 0:
+                    candidates.append((block[1], block[0]))
+                if b < len(blocks) - 1:
+                    candidates.append((block[-1], block[-2]))
+            else:
+                for l in range(1, size):
+                    candidates.append((block[0], block[l]))
+                for l in range(size - 1):
+                    candidates.append((block[-1], block[l]))
+                for l in range(1, size - 1):
+                    candidates.append((block[l], block[0]))
+                    candidates.append((block[l], block[-1]))
+            
+            for i, j in candidates:
+                if (i, j) not in seen:
+                    seen.add((i, j))
+                    self.moves.append(ShiftMove(i, j))
+    def first(self):
+        self.index = 0
+    def next(self, context: ContextJSS):
+        self.index += 1
+    def isDone(self, context: ContextJSS):
+        return self.index >= len(self.moves)
+    def current(self):
+        return self.moves[self.index]
+    
 
 #Atributo criado por mim, não é nativo do ILS, mas me pareceu melhorar o algoritmo
 rollbackChance = 0.1
@@ -279,44 +898,73 @@ rollbackChance = 0.1
 #Nivel da pertubação padrão
 k = 2
 
-context = ContextJSS()
-context.load("job-shop.txt")
+#Avalia a vizinhança do localSearch em lote (precisa do NumPy), em blocos de até batchChunk trocas
+batchDecoder = False
+batchChunk = 1024
 
-timeLimit = int(input("Tempo limite em segundos: (-1 para sem limite)\n"))
-ILSMaxIterations = int(input("Limite de Diferença entre Iterações: (-1 para sem limite)\n"))
-scoreGoal = int(input("Makespan Objetivo: (-1 para sem objetivo)\n"))
+#Movimento escolhido pelo localSearch: "best" (melhor da vizinhança) ou "first" (primeiro que melhora)
+moveSelection = "first"
 
+#O localSearch desce até um ótimo local (na vizinhança "swap", com ordem aleatória e don't look bits)
+descent = True
 
-#Overkill para garantir que seja feito por multiprocessamento
-manager = multiprocessing.Manager()
-return_dict = manager.dict()
+#Vizinhança do localSearch: "swap", "N5" ou "N7"
+neighbourhood = "swap"
 
-p = multiprocessing.Process(target=context.runILS, name="GA", args=(ILSMaxIterations, rollbackChance, k, scoreGoal, return_dict))
+#Decodificador: "semiactive" (cada operação começa em max(máquina, job)) ou "active" (preenche os intervalos ociosos das máquinas)
+decoder = "semiactive"
 
-tInicial = time.time()
+#Critério de aceitação do runILS: "walk", "better", "annealing" ou "restart"
+acceptance = "annealing"
 
-p.start()
+#Controle da força da perturbação: "escalate" (k cresce até melhorar) ou "adaptive" (k segue a taxa de melhoria)
+perturbation = "adaptive"
 
-if timeLimit != -1:
-    p.join(timeLimit)
-else:
-    p.join()
+#Memória máxima, em MB, do cache de avaliações (0 desliga); só é usado com o decodificador ativo
+#Na decodificação semi-ativa o localSearch avalia de forma incremental e não passa pelo cache
+cacheMemory = 0
 
-if p.is_alive():
-    p.terminate()
-    
-tFinal = time.time()
-    
-bestSolution , bestScore = return_dict["best"], return_dict["bestScore"]
+#Número de processos do ILS (1 roda o ILS em um único processo)
+nWorkers = 1
 
-print(f"Best Solution: {bestSolution}")
-print(f"Best Score: {bestScore}")
-print(f"Time: {round(tFinal - tInicial,3)}s")
-    
+#No ILS paralelo, o rollback pode voltar para a melhor solução global
+restartFromIncumbent = False
+
+#Arquivo JSON-lines com a linha do tempo das melhorias (None para não gravar)
+eventsFile = None
+
+#Semente do gerador de números aleatórios (None para sortear) e tamanho do buffer de sorteios (0 sorteia um por vez)
+seed = None
+randomBatch = 0
+
+#Limite de avaliações de cada processo do ILS (-1 para sem limite)
+maxEvaluations = -1
+
+if __name__ == "__main__":
+    context = ContextJSS(batchDecoder, neighbourhood, decoder, cacheMemory, seed, randomBatch, batchChunk, moveSelection, acceptance, perturbation, descent)
+    context.load("job-shop.txt")
+
+    timeLimit = int(input("Tempo limite em segundos: (-1 para sem limite)\n"))
+    ILSMaxIterations = int(input("Limite de Diferença entre Iterações: (-1 para sem limite)\n"))
+    scoreGoal = int(input("Makespan Objetivo: (-1 para sem objetivo)\n"))
 
+    tInicial = time.time()
 
+    #O solver publica cada melhoria no canal de eventos; com um único processo o ILS roda aqui mesmo e para sozinho no tempo limite
+    events = EventStream(eventsFile, crossProcess = nWorkers > 1)
+
+    if nWorkers > 1:
+        bestSolution, bestScore = context.runParallelILS(nWorkers, timeLimit, ILSMaxIterations, rollbackChance, k, scoreGoal, restartFromIncumbent, events = events, maxEvaluations = maxEvaluations)
+    else:
+        solution, bestScore = context.runILS(ILSMaxIterations, rollbackChance, k, scoreGoal, events = events, timeLimit = timeLimit, maxEvaluations = maxEvaluations)
+        bestSolution = list(solution.processingOrder)
         
-    
+        print(f"Stop: {events.last('final').status} - Evaluations: {context.evaluations}")
+        
+    events.close()
+        
+    tFinal = time.time()
 
-    
- 
+    print(f"Best Solution: {bestSolution}")
+    print(f"Best Score: {bestScore} - Lower Bound: {context.lowerBound}")
+    print(f"Time: {round(tFinal - tInicial,3)}s")
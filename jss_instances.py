@@ -0,0 +1,108 @@
+import re
+from array import array
+from typing import Dict, List
+
+#Melhores makespans conhecidos da literatura, usados quando o arquivo não informa
+BEST_KNOWN = {
+    "abz5": 1234, "abz6": 943, "abz7": 656, "abz8": 665, "abz9": 678,
+    "ft06": 55, "ft10": 930, "ft20": 1165,
+    "la01": 666, "la02": 655, "la03": 597, "la04": 590, "la05": 593,
+    "la06": 926, "la07": 890, "la08": 863, "la09": 951, "la10": 958,
+    "la11": 1222, "la12": 1039, "la13": 1150, "la14": 1292, "la15": 1207,
+    "la16": 945, "la17": 784, "la18": 848, "la19": 842, "la20": 902,
+    "la21": 1046, "la22": 927, "la23": 1032, "la24": 935, "la25": 977,
+    "la26": 1218, "la27": 1235, "la28": 1216, "la29": 1152, "la30": 1355,
+    "la31": 1784, "la32": 1850, "la33": 1719, "la34": 1721, "la35": 1888,
+    "la36": 1268, "la37": 1397, "la38": 1196, "la39": 1233, "la40": 1222,
+    "orb01": 1059, "orb02": 888, "orb03": 1005, "orb04": 1005, "orb05": 887,
+    "orb06": 1010, "orb07": 397, "orb08": 899, "orb09": 934, "orb10": 944,
+}
+
+#Uma instância do problema
+#O[j][i] = máquina da i-ésima operação do job j, T[j][m] = tempo de processamento do job j na máquina m
+class ProblemInstance():
+    __slots__ = ("name", "J", "M", "O", "T", "bestKnown")
+
+    def __init__(self, name: str, J: int, M: int, O: List[List[int]], T: List[List[int]], bestKnown: int = None):
+        self.name = name
+        self.J = J
+        self.M = M
+        self.O = O
+        self.T = T
+        self.bestKnown = bestKnown
+
+    def __str__(self):
+        return f"{self.name} ({self.J}x{self.M}) - Best Known: {self.bestKnown}"
+
+    #O e T em vetores planos de inteiros indexados por job*M + operação
+    #OFlat[job*M + i] = máquina da i-ésima operação do job, TFlat[job*M + i] = tempo dessa operação
+    def flatArrays(self):
+        OFlat = array("i", [machine for job in self.O for machine in job])
+        TFlat = array("i", [self.T[job][machine] for job in range(self.J) for machine in self.O[job]])
+
+        return OFlat, TFlat
+
+#Lê as linhas dos jobs: pares (máquina, tempo) na ordem de processamento
+def parseJobs(lines: List[str], J: int, M: int):
+    T = [[0 for _ in range(M)] for _ in range(J)]
+    O = [[0 for _ in range(M)] for _ in range(J)]
+
+    for i in range(J):
+        line = list(map(int, lines[i].split()))
+        lastMachine = -1
+        for j in range(M * 2):
+            if j % 2 == 0:
+                O[i][j // 2] = line[j]
+                lastMachine = line[j]
+            else:
+                T[i][lastMachine] = line[j]
+
+    return O, T
+
+#Arquivo com uma única instância (como o job-shop.txt): "J M" seguido de uma linha por job
+def readInstance(fileName: str, name: str = None) -> ProblemInstance:
+    file = open(fileName, "r")
+    lines = file.read().splitlines()
+    file.close()
+
+    J, M = list(map(int, lines[0].split()))
+    O, T = parseJobs(lines[1:], J, M)
+
+    return ProblemInstance(name or fileName, J, M, O, T)
+
+#Arquivo da OR-Library com várias instâncias (como o job-shop-test-cases.txt)
+#Cada instância tem um cabeçalho "instance <nome>" (às vezes com "= <makespan>"), uma descrição, "J M" e uma linha por job
+def readInstances(fileName: str) -> Dict[str, ProblemInstance]:
+    file = open(fileName, "r")
+    lines = file.read().splitlines()
+    file.close()
+
+    instances = {}
+    name = None
+    bestKnown = None
+    simpleCount = 0
+
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        header = re.match(r"(simple\s+)?instance\b\s*(\w*)", line, re.IGNORECASE)
+
+        if header:
+            if header.group(1):
+                simpleCount += 1
+                name = "simple" if simpleCount == 1 else f"simple{simpleCount}"
+            else:
+                name = header.group(2)
+            value = re.search(r"(\d+)\s*$", line) if "=" in line else None
+            bestKnown = int(value.group(1)) if value else BEST_KNOWN.get(name)
+        elif name is not None and re.fullmatch(r"\d+\s+\d+", line):
+            J, M = list(map(int, line.split()))
+            O, T = parseJobs(lines[i + 1:i + 1 + J], J, M)
+            instances[name] = ProblemInstance(name, J, M, O, T, bestKnown)
+
+            name = None
+            i += J
+
+        i += 1
+
+    return instances
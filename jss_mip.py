@@ -1,57 +1,232 @@
+import multiprocessing, time
 from itertools import product
-from mip import Model, BINARY
-
-def load( fileName: str):
-        file = open(fileName, "r")
-        J, M = list(map(int,file.readline().split()))
-        
-        T = [[0 for _ in range(M)] for _ in range(J)]
-        O = [[0 for _ in range(M)] for _ in range(J)]
-        
-        for i in range(J):
-            line = list(map(int, file.readline().split()))
-            lastMachine = -1
-            for j in range(M * 2):
-                if j % 2 == 0:
-                    O[i][j // 2] = line[j]
-                    lastMachine = line[j]
+from mip import Model, BINARY, LinExpr, OptimizationStatus
+from jss_bounds import headsAndTails, lowerBound
+from jss_decoder import Schedule
+from jss_events import EventStream
+from jss_instances import ProblemInstance, readInstance
+
+#Monta o modelo disjuntivo com um binário por par não ordenado de jobs em cada máquina
+#y(j,k,i) = 1 se o job j vem antes do job k (j < k) na máquina i
+#Com o horizonte H (limite superior do makespan), x[j][i] fica entre head (tempo das operações anteriores do job)
+#e H - tail - p (o tail do jss_bounds não inclui a operação da máquina i), e o big-M de cada disjunção é a maior folga
+#possível entre as duas operações; se uma das ordens é impossível dentro do horizonte, o par não precisa de binário
+#Sem horizon, H é a soma de todos os tempos: com um H apertado e sem solução inicial o CBC demora a achar uma solução viável
+#Retorna (modelo, c, x, y, estatísticas da construção), com y indexado por (j, k, i)
+def build_model(instance: ProblemInstance, horizon: int = None):
+    n, m, times, machines = instance.J, instance.M, instance.T, instance.O
+
+    if horizon is None:
+        horizon = sum(times[j][i] for j in range(n) for i in range(m))
+
+    head, tail = headsAndTails(machines, times)
+
+    model = Model('JSSP')
+
+    #A criação do Model carrega o solver, então ela fica fora do tempo de construção
+    tInitial = time.time()
+
+    #O makespan começa do limite inferior do jss_bounds (jobs, máquinas e Jackson preemptivo)
+    c = model.add_var(name="C", lb=lowerBound(machines, times), ub=horizon)
+    x = [[model.add_var(name='x({},{})'.format(j+1, i+1), lb=head[j][i], ub=horizon - tail[j][i] - times[j][i])
+          for i in range(m)] for j in range(n)]
+
+    model.objective = c
+
+    for (j, i) in product(range(n), range(1, m)):
+        previous, current = machines[j][i-1], machines[j][i]
+        model.add_constr(LinExpr([x[j][current], x[j][previous]], [1, -1], -times[j][previous], ">"))
+
+    y = {}
+    for i in range(m):
+        for j in range(n):
+            for k in range(j + 1, n):
+                #Maior valor possível de x[j] + p[j] - x[k] (j antes de k) e de x[k] + p[k] - x[j] (k antes de j)
+                bigMjk = horizon - tail[j][i] - head[k][i]
+                bigMkj = horizon - tail[k][i] - head[j][i]
+
+                if bigMjk <= 0:
+                    #k nunca termina antes de j começar dentro do horizonte, então j vem antes de k
+                    model.add_constr(LinExpr([x[k][i], x[j][i]], [1, -1], -times[j][i], ">"))
+                elif bigMkj <= 0:
+                    model.add_constr(LinExpr([x[j][i], x[k][i]], [1, -1], -times[k][i], ">"))
                 else:
-                    T[i][lastMachine] = line[j]
-        
-        file.close()
-        
-        return J, M, T, O
+                    y[j, k, i] = model.add_var(var_type=BINARY, name='y({},{},{})'.format(j+1, k+1, i+1))
+                    #x[k] >= x[j] + p[j] - bigMjk*(1 - y)
+                    model.add_constr(LinExpr([x[k][i], x[j][i], y[j, k, i]], [1, -1, -bigMjk], bigMjk - times[j][i], ">"))
+                    #x[j] >= x[k] + p[k] - bigMkj*y
+                    model.add_constr(LinExpr([x[j][i], x[k][i], y[j, k, i]], [1, -1, bigMkj], -times[k][i], ">"))
+
+    for j in range(n):
+        last = machines[j][m - 1]
+        model.add_constr(LinExpr([c, x[j][last]], [1, -1], -times[j][last], ">"))
+
+    stats = {
+        "build_time": time.time() - tInitial,
+        "horizon": horizon,
+        "columns": model.num_cols,
+        "binaries": len(y),
+        "rows": model.num_rows,
+        "nonzeros": model.num_nz,
+    }
+
+    return model, c, x, y, stats
+
+
+#Converte uma ordem de processamento (cromossomo do ILS/GA) em (makespan, tempos de início x[j][i]) do escalonamento semi-ativo
+def order_to_starts(instance: ProblemInstance, processingOrder):
+    n, m = instance.J, instance.M
+    OFlat, TFlat = instance.flatArrays()
+
+    schedule = Schedule(processingOrder, OFlat, TFlat, n, m)
+
+    starts = [[0 for _ in range(m)] for _ in range(n)]
+    for j in range(n):
+        for op in range(m):
+            starts[j][instance.O[j][op]] = schedule.operationStarts[j*m + op]
+
+    return schedule.makespan, starts
+
+
+#Roda o ILS ou o GA por time_limit segundos em um processo filho e retorna a melhor ordem encontrada e o seu makespan
+def heuristic_incumbent(instance: ProblemInstance, algorithm: str = "ils", time_limit: int = 5, seed: int = 0):
+    #Importado só aqui porque o jss_solver importa este módulo sob demanda
+    from jss_solver import solve
+
+    result = solve(instance, algorithm, time_limit, seed)
+
+    return result.processingOrder, result.makespan
+
+
+#Resultado do solve_mip
+#status: OptimizationStatus do python-mip; makespan e starts (x[j][i]) ficam como None se nenhuma solução foi encontrada
+#bound: limite inferior provado; gap: (makespan - bound) / makespan
+#stats: estatísticas da construção do modelo (build_model) e do solve (solve_time, solutions)
+class MIPResult():
+    __slots__ = ("status", "makespan", "bound", "gap", "starts", "stats")
+
+    def __init__(self, status: OptimizationStatus, makespan: float, bound: float, starts, stats: dict):
+        self.status = status
+        self.makespan = makespan
+        self.bound = bound
+        #O limite do solver é um float e pode passar um pouco do makespan
+        self.gap = max(0.0, (makespan - bound) / makespan) if makespan else None
+        self.starts = starts
+        self.stats = stats
+
+    def __str__(self):
+        if self.makespan is None:
+            return f"{self.status.name} - No solution - Bound: {self.bound:g}"
+        return f"{self.status.name} - Makespan: {self.makespan:g} - Bound: {self.bound:g} - Gap: {100 * self.gap:.2f}%"
+
+    def hasSolution(self) -> bool:
+        return self.makespan is not None
+
+
+#Resolve a instância pelo modelo MIP
+#time_limit: segundos para construir e resolver o modelo (-1 para sem limite); o solve recebe o que sobrou da construção
+#threads: threads do CBC (0 usa o padrão do solver); gap: gap relativo em que o solver pode parar (ex: 0.01)
+#incumbent: ordem de processamento (do ILS/GA) usada como solução inicial; o seu makespan vira o horizonte do modelo e o
+#cutoff do objetivo, então o solver só procura soluções melhores e, se não achar, a solução inicial é devolvida
+#verbose: mostra o tamanho do modelo, o resultado e o log do CBC
+def solve_mip(instance: ProblemInstance, time_limit: int = -1, threads: int = 0, gap: float = None, incumbent=None, verbose: bool = True) -> MIPResult:
+    tInitial = time.time()
+    n, m = instance.J, instance.M
+
+    incumbentMakespan, incumbentStarts = None, None
+    if incumbent is not None:
+        incumbentMakespan, incumbentStarts = order_to_starts(instance, incumbent)
+
+    model, c, x, y, stats = build_model(instance, incumbentMakespan)
+
+    if verbose:
+        print("Model built in %.3fs: %d columns (%d binary), %d rows, %d nonzeros, horizon %d" %
+              (stats["build_time"], stats["columns"], stats["binaries"], stats["rows"], stats["nonzeros"], stats["horizon"]))
+
+    model.verbose = 1 if verbose else 0
+    if threads:
+        model.threads = threads
+    if gap is not None:
+        model.max_mip_gap = gap
+
+    if incumbent is not None:
+        start = [(c, incumbentMakespan)]
+        start += [(x[j][i], incumbentStarts[j][i]) for j in range(n) for i in range(m)]
+        start += [(var, 1 if incumbentStarts[j][i] < incumbentStarts[k][i] else 0) for (j, k, i), var in y.items()]
+        model.start = start
+        model.cutoff = incumbentMakespan
+
+        if verbose:
+            print("Warm start with makespan %d" % incumbentMakespan)
+
+    tSolve = time.time()
+    if time_limit != -1:
+        status = model.optimize(max_seconds=max(0.1, time_limit - (tSolve - tInitial)))
+    else:
+        status = model.optimize()
+
+    stats["solve_time"] = time.time() - tSolve
+    stats["solutions"] = model.num_solutions
+    bound = model.objective_bound
+
+    if status in (OptimizationStatus.OPTIMAL, OptimizationStatus.FEASIBLE):
+        result = MIPResult(status, c.x, bound, [[x[j][i].x for i in range(m)] for j in range(n)], stats)
+    elif incumbent is not None:
+        #Nenhuma solução melhor que a inicial: ela é ótima se o limite inferior provado chegou ao seu makespan
+        status = OptimizationStatus.OPTIMAL if bound >= incumbentMakespan - 1e-6 else OptimizationStatus.FEASIBLE
+        result = MIPResult(status, incumbentMakespan, bound, incumbentStarts, stats)
+    else:
+        result = MIPResult(status, None, bound, None, stats)
+
+    if verbose:
+        print(result)
+
+    return result
+
+
+#Roda o solve_mip em um processo filho, para não bloquear quem chama
+#O resultado chega pelo events como um evento "best" (ou "final", sem solução) com o status do solver
+#Retorna o processo já iniciado; use events.wait([p], time_limit) para acompanhar
+def start_mip(instance: ProblemInstance, events: EventStream, time_limit: int = -1, threads: int = 0, gap: float = None, incumbent=None):
+    p = multiprocessing.Process(target=publish_mip, name=f"mip-{instance.name}", args=(instance, events, time_limit, threads, gap, incumbent))
+    p.start()
+
+    return p
+
 
+def publish_mip(instance: ProblemInstance, events: EventStream, time_limit: int = -1, threads: int = 0, gap: float = None, incumbent=None):
+    result = solve_mip(instance, time_limit, threads, gap, incumbent, verbose=False)
 
-n, m, times, machines = load("job-shop.txt")
+    if result.hasSolution():
+        events.publish(0, round(result.makespan), status=result.status.name)
+    else:
+        events.publish(0, None, kind="final", status=result.status.name)
 
-M = sum(times[i][j] for i in range(n) for j in range(m))
 
-model = Model('JSSP')
+#Heurística que gera a solução inicial do MIP: "ils", "ga" ou None para resolver sem solução inicial
+warmStart = "ils"
 
-c = model.add_var(name="C")
-x = [[model.add_var(name='x({},{})'.format(j+1, i+1))
-      for i in range(m)] for j in range(n)]
-y = [[[model.add_var(var_type=BINARY, name='y({},{},{})'.format(j+1, k+1, i+1))
-       for i in range(m)] for k in range(n)] for j in range(n)]
+#Segundos de heurística antes do MIP
+heuristicTime = 5
 
-model.objective = c
+#Tempo limite do MIP em segundos (-1 para sem limite), threads do CBC (0 para o padrão) e gap relativo para parar (None para 0)
+timeLimit = 60
+threads = 0
+relativeGap = None
 
-for (j, i) in product(range(n), range(1, m)):
-    model += x[j][machines[j][i]] - x[j][machines[j][i-1]] >= \
-        times[j][machines[j][i-1]]
+if __name__ == "__main__":
+    instance = readInstance("job-shop.txt")
 
-for (j, k) in product(range(n), range(n)):
-    if k != j:
-        for i in range(m):
-            model += x[j][i] - x[k][i] + M*y[j][k][i] >= times[k][i]
-            model += -x[j][i] + x[k][i] - M*y[j][k][i] >= times[j][i] - M
+    incumbent = None
+    if warmStart is not None:
+        incumbent, _ = heuristic_incumbent(instance, warmStart, heuristicTime)
 
-for j in range(n):
-    model += c - x[j][machines[j][m - 1]] >= times[j][machines[j][m - 1]]
+    result = solve_mip(instance, timeLimit, threads, relativeGap, incumbent)
 
-model.optimize()
+    if not result.hasSolution():
+        print("No solution found: ", result.status)
+        exit()
 
-print("Completion time: ", c.x)
-for (j, i) in product(range(n), range(m)):
-    print("task %d starts on machine %d at time %g " % (j+1, i+1, x[j][i].x))
\ No newline at end of file
+    print("Completion time: ", result.makespan)
+    for (j, i) in product(range(instance.J), range(instance.M)):
+        print("task %d starts on machine %d at time %g " % (j+1, i+1, result.starts[j][i]))
@@ -0,0 +1,55 @@
+import multiprocessing
+from array import array
+from typing import List
+from jss_decoder import activeMakespan, makespan
+
+#Avaliação de populações em um pool persistente de processos
+#O pool é criado uma vez por execução e cada processo recebe a instância (O e T planos) e o decodificador no initializer,
+#então por geração só passam as soluções e os makespans
+#As soluções (arrays "i") vão concatenadas em um bloco de bytes por processo, e cada bloco volta como
+#um array "i" de makespans: uma ida e volta por geração, sem um pickle por indivíduo
+#Com poucas operações para decodificar (indivíduos x J*M abaixo de minOperations) o IPC custa mais que a avaliação,
+#e worthwhile() diz para quem chama avaliar no próprio processo
+class PoolEvaluator():
+    __slots__ = ("nWorkers", "minOperations", "size", "pool")
+
+    def __init__(self, nWorkers: int, OFlat: array, TFlat: array, J: int, M: int, decoder: str = "semiactive", minOperations: int = 200000):
+        self.nWorkers = nWorkers
+        self.minOperations = minOperations
+        self.size = J * M
+        self.pool = multiprocessing.Pool(nWorkers, initializer = initEvaluationWorker, initargs = (OFlat, TFlat, J, M, decoder))
+
+    def worthwhile(self, count: int) -> bool:
+        return count * self.size >= self.minOperations
+
+    #Makespans das soluções (arrays "i" de J*M jobs), na mesma ordem
+    def evaluate(self, solutions: List[array]) -> array:
+        #Um bloco por processo; o join lê os buffers dos arrays direto, sem convertê-los um a um
+        blockSize = -(-len(solutions) // self.nWorkers)
+        blocks = [b"".join(solutions[i:i + blockSize]) for i in range(0, len(solutions), blockSize)]
+
+        makespans = array("i")
+        for block in self.pool.map(evaluateBlock, blocks, chunksize = 1):
+            makespans.frombytes(block)
+
+        return makespans
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+#Estado de cada processo do pool: (OFlat, TFlat, J, M, função de avaliação)
+workerInstance = None
+
+def initEvaluationWorker(OFlat: array, TFlat: array, J: int, M: int, decoder: str):
+    global workerInstance
+    workerInstance = (OFlat, TFlat, J, M, activeMakespan if decoder == "active" else makespan)
+
+def evaluateBlock(block: bytes) -> bytes:
+    OFlat, TFlat, J, M, evaluate = workerInstance
+    size = J * M
+
+    solutions = array("i")
+    solutions.frombytes(block)
+
+    return array("i", [evaluate(solutions[i:i + size], OFlat, TFlat, J, M) for i in range(0, len(solutions), size)]).tobytes()
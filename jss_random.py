@@ -0,0 +1,65 @@
+import hashlib, os, random
+from array import array
+
+#Fluxo de números aleatórios de um solver
+#A semente interna é o SHA-256 de (semente raiz, caminho), então spawn(i) gera fluxos independentes e reproduzíveis
+#para cada processo (ILS paralelo) ou ilha (GA) sem depender da ordem em que eles são criados
+class RandomStream(random.Random):
+    def __init__(self, seed: int = None, path: tuple = ()):
+        if seed is None:
+            seed = int.from_bytes(os.urandom(8), "big")
+
+        self.rootSeed = seed
+        self.path = tuple(path)
+
+        digest = hashlib.sha256(repr((seed, self.path)).encode()).digest()
+        super().__init__(int.from_bytes(digest, "big"))
+
+    #O pickle padrão do Random recria o objeto sem argumentos, o que perderia a semente raiz e o caminho
+    def __reduce__(self):
+        return (self.__class__, (self.rootSeed, self.path), self.getstate())
+
+    def spawn(self, index: int) -> 'RandomStream':
+        return self.__class__(self.rootSeed, self.path + (index,))
+
+#Mesmo fluxo, mas random() e randint() consomem um buffer de inteiros de 64 bits gerado de uma vez com randbytes
+#Troca uma chamada ao gerador por sorteio por uma leitura do buffer nos laços quentes (perturbação, mutação, rollback)
+#A sequência de números é diferente da do RandomStream com a mesma semente
+class BatchRandomStream(RandomStream):
+    def __init__(self, seed: int = None, path: tuple = (), batchSize: int = 4096):
+        self.batchSize = batchSize
+        self.buffer = array("Q")
+        self.position = 0
+        super().__init__(seed, path)
+
+    def __reduce__(self):
+        return (self.__class__, (self.rootSeed, self.path, self.batchSize), (self.getstate(), self.buffer, self.position))
+
+    def __setstate__(self, state):
+        randomState, self.buffer, self.position = state
+        self.setstate(randomState)
+
+    def spawn(self, index: int) -> 'BatchRandomStream':
+        return self.__class__(self.rootSeed, self.path + (index,), self.batchSize)
+
+    def nextWord(self) -> int:
+        if self.position >= len(self.buffer):
+            self.buffer = array("Q", self.randbytes(8 * self.batchSize))
+            self.position = 0
+
+        word = self.buffer[self.position]
+        self.position += 1
+        return word
+
+    def random(self) -> float:
+        return (self.nextWord() >> 11) * (1.0 / 9007199254740992.0)
+
+    #Multiplicação em vez de resto: o viés é de no máximo (b - a + 1) / 2**64
+    def randint(self, a: int, b: int) -> int:
+        return a + ((self.nextWord() * (b - a + 1)) >> 64)
+
+#RandomStream ou BatchRandomStream (batchSize > 0)
+def makeRandom(seed: int = None, batchSize: int = 0) -> RandomStream:
+    if batchSize > 0:
+        return BatchRandomStream(seed, batchSize = batchSize)
+    return RandomStream(seed)
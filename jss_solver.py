@@ -0,0 +1,175 @@
+import argparse, multiprocessing, random, time
+from typing import List, Union
+
+import jss_alg_genetico, jss_ils_fast, jss_tabu
+from jss_bounds import lowerBound
+from jss_alg_genetico import ContextJSS as GeneticContextJSS
+from jss_events import EventStream, ImprovementEvent
+from jss_ils_fast import ContextJSS, SolutionJSS
+from jss_instances import ProblemInstance, readInstance, readInstances
+from jss_tabu import TabuSearchJSS
+
+#API de biblioteca dos solvers: importar este módulo não lê arquivos, não pede entrada e não cria processos
+#solve() roda um solver em um processo filho até o tempo limite e devolve um SolveResult
+#Os parâmetros de cada solver são as constantes do seu módulo (jss_ils_fast.k, jss_alg_genetico.populationSize, ...)
+
+ALGORITHMS = ("ils", "ga", "tabu", "mip", "hybrid")
+
+#Segundos além do tempo limite que o solve espera uma metaheurística terminar antes de encerrar o processo
+stopGrace = 2
+
+#Resultado do solve
+#processingOrder fica como None no MIP, que não trabalha com a ordem de processamento
+#lowerBound: limite inferior do jss_bounds; status "OPTIMAL" quando o makespan chegou nele
+class SolveResult():
+    __slots__ = ("instance", "algorithm", "seed", "makespan", "lowerBound", "processingOrder", "evaluations", "cacheHits", "wallTime", "status", "events")
+
+    def __init__(self, instance: ProblemInstance, algorithm: str, seed: int, wallTime: float, events: EventStream):
+        best = events.best()
+
+        self.instance = instance
+        self.algorithm = algorithm
+        self.seed = seed
+        self.makespan = None if best is None else best.makespan
+        self.lowerBound = lowerBound(instance.O, instance.T)
+        self.processingOrder = None if best is None else best.solution
+        #Decodificações e acertos do cache, separados para comparar execuções com e sem cache
+        self.evaluations = max((event.evaluations for event in events.events if event.evaluations is not None), default = None)
+        self.cacheHits = max((event.cacheHits for event in events.events if event.cacheHits is not None), default = None)
+        self.wallTime = wallTime
+        #Motivo da parada: vem do evento "final" dos solvers ou do "best" do MIP, que leva o status do CBC
+        #(os eventos "control" do ILS também têm status, mas com a decisão do controle da perturbação)
+        self.status = next((event.status for event in reversed(events.events) if event.kind in ("final", "best") and event.status is not None), None)
+        #Linha do tempo das melhorias
+        self.events : List[ImprovementEvent] = events.events
+
+    def __str__(self):
+        return f"{self.instance.name} - {self.algorithm} - seed {self.seed}: {self.makespan} (lower bound {self.lowerBound}) in {round(self.wallTime, 3)}s"
+
+    #Gap em porcentagem para o melhor makespan conhecido da instância (None se não houver)
+    def gap(self) -> float:
+        if self.makespan is None or not self.instance.bestKnown:
+            return None
+        return round(100 * (self.makespan - self.instance.bestKnown) / self.instance.bestKnown, 3)
+
+#Roda um solver no processo atual até o tempo limite; as melhorias são publicadas no events
+#A semente vai para o gerador de números aleatórios do contexto do solver
+#Os solvers não imprimem o progresso (verbose = False): ele chega pelos eventos "progress"
+def runSolver(algorithm: str, instance: ProblemInstance, timeLimit: int, seed: int, events: EventStream, goal: int = -1):
+    if algorithm == "ils":
+        context = ContextJSS(batchDecoder = jss_ils_fast.batchDecoder, neighbourhood = jss_ils_fast.neighbourhood, decoder = jss_ils_fast.decoder,
+                             cacheMemory = jss_ils_fast.cacheMemory, seed = seed, randomBatch = jss_ils_fast.randomBatch, batchChunk = jss_ils_fast.batchChunk,
+                             moveSelection = jss_ils_fast.moveSelection, acceptance = jss_ils_fast.acceptance, perturbation = jss_ils_fast.perturbation,
+                             descent = jss_ils_fast.descent)
+        context.verbose = False
+        context.loadInstance(instance)
+        context.runILS(-1, jss_ils_fast.rollbackChance, jss_ils_fast.k, goal, events=events, timeLimit=timeLimit)
+    elif algorithm == "ga":
+        context = GeneticContextJSS(mutationRate = jss_alg_genetico.mutationRate, populationSize = jss_alg_genetico.populationSize,
+                                    batchDecoder = jss_alg_genetico.batchDecoder, decoder = jss_alg_genetico.decoder, cacheMemory = jss_alg_genetico.cacheMemory,
+                                    seed = seed, randomBatch = jss_alg_genetico.randomBatch, evaluationWorkers = jss_alg_genetico.evaluationWorkers)
+        context.verbose = False
+        context.loadInstance(instance)
+        context.runGA(-1, goal, events=events, timeLimit=timeLimit)
+    elif algorithm == "tabu":
+        context = ContextJSS(decoder = jss_tabu.decoder, cacheMemory = jss_tabu.cacheMemory, seed = seed)
+        context.verbose = False
+        context.loadInstance(instance)
+        tabuSearch = TabuSearchJSS(context, jss_tabu.tabuTenure, jss_tabu.maxElite, jss_tabu.stallIterations, jss_tabu.neighbourhood)
+        tabuSearch.runTabu(-1, goal, events=events, k=jss_tabu.k, timeLimit=timeLimit)
+    elif algorithm in ("mip", "hybrid"):
+        #Importado só aqui para que as metaheurísticas não dependam do python-mip
+        import jss_mip
+        from jss_mip import heuristic_incumbent, publish_mip
+
+        #hybrid: o ILS roda por um quarto do tempo e a sua melhor solução é a solução inicial do MIP
+        #Sem tempo limite (-1), o ILS roda pelo heuristicTime do jss_mip e o MIP continua sem limite
+        incumbent = None
+        if algorithm == "hybrid":
+            heuristicTime = jss_mip.heuristicTime if timeLimit == -1 else max(1, timeLimit // 4)
+            incumbent, incumbentMakespan = heuristic_incumbent(instance, "ils", heuristicTime, seed)
+            events.publish(0, incumbentMakespan, incumbent)
+            if timeLimit != -1:
+                timeLimit -= heuristicTime
+
+        publish_mip(instance, events, timeLimit, incumbent=incumbent)
+    else:
+        raise ValueError(f"Algoritmo desconhecido: {algorithm}")
+
+#Decodificador usado pelo solver, para mostrar o escalonamento com o mesmo makespan que ele encontrou
+#O hybrid só tem uma ordem de processamento quando a melhor solução é a do ILS
+def solverDecoder(algorithm: str) -> str:
+    if algorithm == "ga":
+        return jss_alg_genetico.decoder
+    if algorithm == "tabu":
+        return jss_tabu.decoder
+    return jss_ils_fast.decoder
+
+#Resolve a instância com o algoritmo escolhido em um processo filho, que para sozinho no tempo limite
+#instance: ProblemInstance ou nome de um arquivo com uma única instância
+#goal: para quando o makespan chegar nele (-1 para sem objetivo); seed: None sorteia uma semente
+#O processo só é encerrado à força se passar stopGrace segundos do limite (mipGrace no MIP, que demora mais para parar);
+#com timeLimit = -1 ele nunca é encerrado
+#eventsFile: grava a linha do tempo das melhorias em JSON-lines
+def solve(instance: Union[ProblemInstance, str], algorithm: str = "ils", timeLimit: int = 10, seed: int = None, goal: int = -1, eventsFile: str = None, mipGrace: int = 10) -> SolveResult:
+    if isinstance(instance, str):
+        instance = readInstance(instance)
+    if algorithm not in ALGORITHMS:
+        raise ValueError(f"Algoritmo desconhecido: {algorithm}")
+    if seed is None:
+        seed = random.randrange(2**31)
+
+    events = EventStream(eventsFile)
+    p = multiprocessing.Process(target=runSolver, name=f"{algorithm}-{instance.name}", args=(algorithm, instance, timeLimit, seed, events, goal))
+
+    #Sem tempo limite (-1) espera o solver terminar sozinho (objetivo, ótimo ou limite de iterações)
+    waitLimit = -1 if timeLimit == -1 else timeLimit + (mipGrace if algorithm in ("mip", "hybrid") else stopGrace)
+
+    tInitial = time.time()
+    p.start()
+    events.wait([p], waitLimit)
+
+    if p.is_alive():
+        p.terminate()
+        p.join()
+
+    wallTime = time.time() - tInitial
+    events.close()
+
+    return SolveResult(instance, algorithm, seed, wallTime, events)
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve uma instância do job-shop")
+    parser.add_argument("file", nargs="?", default="job-shop.txt", help="arquivo da instância")
+    parser.add_argument("--name", default=None, help="nome da instância em um arquivo da OR-Library com várias instâncias (ex: ft06)")
+    parser.add_argument("--algorithm", choices=ALGORITHMS, default="ils")
+    parser.add_argument("--time-limit", type=int, default=10, help="tempo limite em segundos")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--goal", type=int, default=-1, help="makespan objetivo (-1 para sem objetivo)")
+    parser.add_argument("--events", default=None, metavar="FILE", help="grava a linha do tempo das melhorias em JSON-lines")
+    args = parser.parse_args()
+
+    if args.name is not None:
+        instances = readInstances(args.file)
+        if args.name not in instances:
+            parser.error(f"instância {args.name} não encontrada em {args.file}")
+        instance = instances[args.name]
+    else:
+        instance = readInstance(args.file)
+
+    result = solve(instance, args.algorithm, args.time_limit, args.seed, args.goal, args.events)
+
+    if result.processingOrder is not None:
+        solution = SolutionJSS(ContextJSS(decoder = solverDecoder(result.algorithm)))
+        solution.context.loadInstance(instance)
+        solution.setSolution(result.processingOrder)
+        print(f"Best Solution: {solution}")
+
+    print(f"Best Score: {result.makespan}")
+    print(f"Lower Bound: {result.lowerBound}")
+    if result.gap() is not None:
+        print(f"Gap: {result.gap()}%")
+    print(f"Time: {round(result.wallTime, 3)}s")
+
+if __name__ == "__main__":
+    main()
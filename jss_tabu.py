@@ -0,0 +1,281 @@
+import time
+from typing import Dict, List, Tuple
+from array import array
+from jss_budget import Budget
+from jss_events import EventStream, RateLimiter
+from jss_ils_fast import ContextJSS, IncrementalEvaluator, NSCriticalIterator, SolutionJSS
+
+#Busca tabu no estilo do TSAB de Nowicki e Smutnicki sobre a vizinhança N5 (ou N7) do caminho crítico
+#Cada movimento inverte a ordem de duas operações de um bloco crítico; o atributo do movimento é o par (a, b) de operações
+#(índices job*M + operação) que passa a ter a antes de b, e o par inverso fica tabu por tabuTenure iterações
+
+#Lista tabu guardada em um dicionário: atributo -> iteração em que ele deixa de ser tabu
+class TabuList():
+    __slots__ = ("tenure", "expires")
+
+    def __init__(self, tenure: int):
+        self.tenure = tenure
+        self.expires : Dict[Tuple[int, int], int] = {}
+
+    def add(self, attribute: Tuple[int, int], iteration: int):
+        #Descarta os atributos vencidos de vez em quando para o dicionário não crescer sem limite
+        if len(self.expires) > 4 * self.tenure:
+            self.expires = {key: value for key, value in self.expires.items() if value > iteration}
+
+        self.expires[attribute] = iteration + self.tenure
+
+    def isTabu(self, attribute: Tuple[int, int], iteration: int) -> bool:
+        return self.expires.get(attribute, 0) > iteration
+
+    def expiration(self, attribute: Tuple[int, int]) -> int:
+        return self.expires.get(attribute, 0)
+
+    def copy(self) -> 'TabuList':
+        tabu = TabuList(self.tenure)
+        tabu.expires = dict(self.expires)
+        return tabu
+
+#Solução de elite para o back jump: a ordem, a lista tabu daquele momento e os atributos dos movimentos já tentados a partir dela
+class EliteSolution():
+    __slots__ = ("processingOrder", "score", "tabu", "tried")
+
+    def __init__(self, processingOrder: List[int], score: int, tabu: TabuList):
+        self.processingOrder = array("i", processingOrder)
+        self.score = score
+        self.tabu = tabu.copy()
+        self.tried = set()
+
+class TabuSearchJSS():
+    def __init__(self, context: ContextJSS, tabuTenure: int = 8, maxElite: int = 5, stallIterations: int = 1000, neighbourhood: str = "N5"):
+        self.context = context
+        #Número de iterações em que o inverso de um movimento feito fica proibido
+        self.tabuTenure = tabuTenure
+        #Tamanho máximo da lista de soluções de elite usadas nos back jumps
+        self.maxElite = maxElite
+        #Iterações sem melhorar a melhor solução antes de voltar para uma solução de elite
+        self.stallIterations = stallIterations
+        #"N5" ou "N7"
+        self.neighbourhood = neighbourhood
+
+        if neighbourhood not in ("N5", "N7"):
+            raise ValueError(f"Vizinhança desconhecida: {neighbourhood}")
+
+    #Movimentos da vizinhança com o makespan de cada um, avaliado de forma incremental a partir da posição do movimento
+    #Retorna uma lista de (makespan, atributo, movimento)
+    def scoreMoves(self, solution: SolutionJSS, evaluator: IncrementalEvaluator):
+        context = self.context
+        processingOrder = solution.processingOrder
+
+        evaluator.setBase(processingOrder)
+
+        iterator = NSCriticalIterator(context, solution, self.neighbourhood)
+        iterator.first()
+
+        #O escalonamento já foi decodificado pelo iterador para achar os blocos críticos
+        operations = solution.schedule().operations
+
+        scored = []
+        while not iterator.isDone(context):
+            move = iterator.current()
+
+            operationI = operations[move.i]
+            operationJ = operations[move.j]
+            attribute = (operationI, operationJ) if move.i > move.j else (operationJ, operationI)
+
+            returnMove = move.apply(context, solution)
+            score = evaluator.evaluate(processingOrder, min(move.i, move.j))
+            returnMove.apply(context, solution)
+
+            scored.append((score, attribute, move))
+            iterator.next(context)
+
+        return scored
+
+    #O atributo do candidato é a ordem que ele cria, e a lista tabu guarda a ordem que desfaria cada movimento feito,
+    #então o candidato é tabu quando o seu próprio atributo está na lista; a aspiração libera o que melhora a melhor solução
+    def isAllowed(self, candidate, tabu: TabuList, iteration: int, bestScore: int) -> bool:
+        return candidate[0] < bestScore or not tabu.isTabu(candidate[1], iteration)
+
+    #Melhor movimento que não é tabu, ou tabu que melhora a melhor solução (aspiração)
+    #Se todos forem tabu, escolhe o que deixa de ser tabu mais cedo
+    def selectMove(self, scored, tabu: TabuList, iteration: int, bestScore: int):
+        allowed = [candidate for candidate in scored if self.isAllowed(candidate, tabu, iteration, bestScore)]
+
+        if allowed:
+            return min(allowed, key = lambda candidate: candidate[0])
+
+        return min(scored, key = lambda candidate: tabu.expiration(candidate[1]))
+
+    #return_dict: recebe a melhor solução a cada melhoria (opcional)
+    #events: recebe um evento a cada melhoria, uma amostra do progresso a cada printInterval segundos e um evento "final" com o motivo da parada
+    #timeLimit e maxEvaluations: orçamento em segundos e em avaliações (-1 para sem limite), verificado a cada iteração
+    def runTabu(self, maxIterations: int, goal: int, return_dict: dict = None, events: EventStream = None, k: int = 2, timeLimit: float = -1, maxEvaluations: int = -1):
+        context = self.context
+
+        progress = RateLimiter(context.printInterval)
+        budget = context.budget = Budget(timeLimit, maxEvaluations).start(context.evaluations)
+
+        solution = context.generateInitialSolution()
+        evaluator = IncrementalEvaluator(context)
+
+        bestScore = context.minimize(solution)
+        bestSolution = SolutionJSS(context)
+        bestSolution.setSolution(solution.processingOrder)
+
+        if return_dict is not None:
+            return_dict["best"] = bestSolution.processingOrder
+            return_dict["bestScore"] = bestScore
+
+        if events is not None:
+            events.publish(0, bestScore, bestSolution.processingOrder, context.evaluations)
+
+        tabu = TabuList(self.tabuTenure)
+        elite : List[EliteSolution] = [EliteSolution(solution.processingOrder, bestScore, tabu)]
+        #Solução de elite de onde o próximo movimento parte (None fora dos back jumps e das melhorias)
+        origin = elite[-1]
+
+        maxIterations = float("inf") if maxIterations == -1 else maxIterations
+
+        currentIteration = 0
+        bestIteration = 0
+        currentScore = bestScore
+        status = "ITERATION_LIMIT"
+
+        while currentIteration < maxIterations:
+            if bestScore <= context.lowerBound:
+                status = "OPTIMAL"
+                break
+
+            if goal != -1 and bestScore <= goal:
+                status = "GOAL"
+                break
+
+            if budget.exhausted(context.evaluations):
+                status = budget.status
+                break
+
+            currentIteration += 1
+
+            if currentIteration - bestIteration > self.stallIterations:
+                #Back jump: volta para a última solução de elite; sem elites, recomeça de uma perturbação da melhor solução
+                if elite:
+                    origin = elite[-1]
+                    solution.setSolution(origin.processingOrder)
+                    tabu = origin.tabu.copy()
+                else:
+                    solution.setSolution(bestSolution.processingOrder)
+                    context.applyPertubation(solution, k)
+                    tabu = TabuList(self.tabuTenure)
+                    origin = EliteSolution(solution.processingOrder, context.minimize(solution), tabu)
+                    elite.append(origin)
+                bestIteration = currentIteration
+
+            scored = self.scoreMoves(solution, evaluator)
+
+            if origin is not None:
+                scored = [candidate for candidate in scored if candidate[1] not in origin.tried]
+
+            if not scored:
+                #Todos os vizinhos da solução de elite já foram tentados (ou a vizinhança é vazia)
+                if origin is not None and elite and elite[-1] is origin:
+                    elite.pop()
+                origin = None
+                bestIteration = currentIteration - self.stallIterations - 1
+                continue
+
+            score, attribute, move = self.selectMove(scored, tabu, currentIteration, bestScore)
+
+            if origin is not None:
+                origin.tried.add(attribute)
+                origin = None
+
+            move.apply(context, solution)
+            tabu.add((attribute[1], attribute[0]), currentIteration)
+            currentScore = score
+
+            if progress.due():
+                if context.verbose:
+                    print(f"Iteration: {currentIteration} - Score: {currentScore} - BestScore: {bestScore}")
+
+                if events is not None:
+                    events.publish(currentIteration, bestScore, None, context.evaluations, "progress", cacheHits = context.cacheHits())
+
+            if currentScore < bestScore:
+                bestScore = currentScore
+                bestSolution.setSolution(solution.processingOrder)
+                bestIteration = currentIteration
+
+                origin = EliteSolution(solution.processingOrder, bestScore, tabu)
+                elite.append(origin)
+                if len(elite) > self.maxElite:
+                    elite.pop(0)
+
+                if return_dict is not None:
+                    return_dict["best"] = bestSolution.processingOrder
+                    return_dict["bestScore"] = bestScore
+
+                if events is not None:
+                    events.publish(currentIteration, bestScore, bestSolution.processingOrder, context.evaluations)
+
+        if events is not None:
+            events.publish(currentIteration, bestScore, None, context.evaluations, "final", status, context.cacheHits())
+
+        return bestSolution, bestScore
+
+
+#Iterações em que o inverso de um movimento fica tabu
+tabuTenure = 8
+
+#Soluções de elite guardadas para os back jumps
+maxElite = 5
+
+#Iterações sem melhora antes de um back jump
+stallIterations = 1000
+
+#Vizinhança da busca tabu: "N5" ou "N7"
+neighbourhood = "N5"
+
+#Decodificador: "semiactive" ou "active"
+decoder = "semiactive"
+
+#Memória máxima, em MB, do cache de avaliações (0 desliga); só é usado com o decodificador ativo
+#Na decodificação semi-ativa os movimentos são avaliados de forma incremental e não passam pelo cache
+cacheMemory = 0
+
+#Perturbação usada para recomeçar quando as soluções de elite se esgotam
+k = 2
+
+#Arquivo JSON-lines com a linha do tempo das melhorias (None para não gravar)
+eventsFile = None
+
+#Semente do gerador de números aleatórios (None para sortear)
+seed = None
+
+#Limite de avaliações (-1 para sem limite)
+maxEvaluations = -1
+
+if __name__ == "__main__":
+    context = ContextJSS(decoder = decoder, cacheMemory = cacheMemory, seed = seed)
+    context.load("job-shop.txt")
+
+    tabuSearch = TabuSearchJSS(context, tabuTenure, maxElite, stallIterations, neighbourhood)
+
+    timeLimit = int(input("Tempo limite em segundos: (-1 para sem limite)\n"))
+    maxIterations = int(input("Limite de iterações: (-1 para sem limite)\n"))
+    scoreGoal = int(input("Makespan Objetivo: (-1 para sem objetivo)\n"))
+
+    tInicial = time.time()
+
+    #A busca roda aqui mesmo e para sozinha no tempo limite
+    events = EventStream(eventsFile, crossProcess = False)
+
+    bestSolution, bestScore = tabuSearch.runTabu(maxIterations, scoreGoal, events = events, k = k, timeLimit = timeLimit, maxEvaluations = maxEvaluations)
+
+    events.close()
+
+    tFinal = time.time()
+
+    print(f"Best Solution: {bestSolution}")
+    print(f"Best Score: {bestScore} - Lower Bound: {context.lowerBound}")
+    print(f"Stop: {events.last('final').status} - Evaluations: {context.evaluations}")
+    print(f"Time: {round(tFinal - tInicial,3)}s")